@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+import zipfile
+import xml.etree.ElementTree as ElementTree
+import numpy as np
+import cadquery as cq
+from skirmishbunker import Bunker
+from skirmishbunker.stlStream import STL_DTYPE
+
+# File size and write time of the example/bunker.py plate as 3MF,
+# against export_stl_fast and cq.exporters.export.
+# The 3MF is read back and its placed triangles compared with the STL.
+
+NAMESPACE = "{http://schemas.microsoft.com/3dmanufacturing/core/2015/02}"
+
+def make_bunker():
+    bp = Bunker()
+    bp.inset=15
+    bp.width=140
+    bp.length=110
+    bp.height=65
+    bp.render_panel_details=True
+    bp.panel_length=28
+    bp.panel_width = 6
+    bp.panel_padding = 4
+    bp.render_windows=True
+    bp.skip_windows = []
+    bp.window_length = 8
+    bp.window_height = 24
+    bp.render_doors=True
+    bp.door_panels = [0]
+    bp.render_ladders=True
+    bp.ladder_panels = [8]
+    bp.render_floor_tiles=True
+    bp.render_roof=True
+    bp.floor_padding = -5
+    bp.render_floor_cuts = True
+    bp.render_pips=True
+    bp.make()
+    return bp
+
+def read_3mf(path):
+    with zipfile.ZipFile(path) as package:
+        model = ElementTree.fromstring(package.read("3D/3dmodel.model"))
+
+    meshes = {}
+    placed = []
+    for obj in model.iter(f"{NAMESPACE}object"):
+        mesh = obj.find(f"{NAMESPACE}mesh")
+        if mesh is not None:
+            vertices = np.array([[float(v.get(axis)) for axis in "xyz"] for v in mesh.iter(f"{NAMESPACE}vertex")])
+            triangles = np.array([[int(t.get(f"v{i}")) for i in (1, 2, 3)] for t in mesh.iter(f"{NAMESPACE}triangle")])
+            meshes[obj.get("id")] = vertices[triangles]
+            continue
+
+        for component in obj.iter(f"{NAMESPACE}component"):
+            values = np.array([float(value) for value in component.get("transform").split()])
+            rotation = values[:9].reshape(3, 3)
+            placed.append(meshes[component.get("objectid")] @ rotation + values[9:])
+    return np.concatenate(placed)
+
+def read_stl(path):
+    return np.fromfile(path, dtype=STL_DTYPE, offset=84)["vertices"]
+
+out_dir = tempfile.mkdtemp()
+bp = make_bunker()
+
+start = time.perf_counter()
+plate = bp.build_plate()
+cq.exporters.export(plate, os.path.join(out_dir, "export.stl"))
+export_time = time.perf_counter() - start
+
+start = time.perf_counter()
+bp.export_stl_fast(os.path.join(out_dir, "fast.stl"))
+fast_time = time.perf_counter() - start
+
+start = time.perf_counter()
+stats = bp.export_3mf(os.path.join(out_dir, "bunker.3mf"), plate=True)
+mf_time = time.perf_counter() - start
+
+for name, seconds in (("export.stl", export_time), ("fast.stl", fast_time), ("bunker.3mf", mf_time)):
+    print(f"{name:11} {seconds:6.2f}s {os.path.getsize(os.path.join(out_dir, name)) / 1e6:7.2f} MB")
+print(stats)
+
+fast = read_stl(os.path.join(out_dir, "fast.stl"))
+placed = read_3mf(os.path.join(out_dir, "bunker.3mf"))
+assert abs(len(placed) - len(fast)) <= len(fast) * 0.001
+assert np.allclose(placed.reshape(-1, 3).min(axis=0), fast.reshape(-1, 3).min(axis=0), atol=1e-3)
+assert np.allclose(placed.reshape(-1, 3).max(axis=0), fast.reshape(-1, 3).max(axis=0), atol=1e-3)
+print(f"{len(placed)} placed 3MF triangles match the {len(fast)} STL triangles")
@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from skirmishbunker import Bunker, Catwalk
+from skirmishbunker.stlStream import STL_DTYPE
+
+# File size and write time of a bunker and a catwalk as GLB against
+# export_stl_fast. The GLB is read back, its nodes placed and the placed
+# triangles compared with the STL.
+#
+#   python benchmarks/export_glb.py --profile draft
+
+COMPONENT_TYPES = {5123: np.uint16, 5125: np.uint32, 5126: np.float32}
+
+def make_bunker():
+    bp = Bunker()
+    bp.render_panel_details = True
+    bp.render_windows = True
+    bp.render_doors = True
+    bp.render_ladders = True
+    bp.ladder_panels = [1]
+    bp.render_floor_tiles = True
+    bp.render_floor_cuts = True
+    bp.render_pips = True
+    bp.make()
+    return bp
+
+def make_catwalk():
+    catwalk = Catwalk()
+    catwalk.make()
+    return catwalk
+
+def read_accessor(document, data, index):
+    accessor = document["accessors"][index]
+    view = document["bufferViews"][accessor["bufferView"]]
+    values = np.frombuffer(data, COMPONENT_TYPES[accessor["componentType"]], accessor["count"] * (3 if accessor["type"] == "VEC3" else 1), view["byteOffset"])
+    return values.reshape(-1, 3)
+
+def read_glb(path):
+    with open(path, "rb") as glb_file:
+        content = glb_file.read()
+
+    magic, version, length = np.frombuffer(content, "<u4", 3)
+    assert magic == 0x46546C67 and version == 2 and length == len(content)
+    json_length = int(np.frombuffer(content, "<u4", 1, 12)[0])
+    document = json.loads(content[20:20 + json_length])
+    data = content[28 + json_length:]
+
+    meshes = []
+    for mesh in document["meshes"]:
+        primitive = mesh["primitives"][0]
+        vertices = read_accessor(document, data, primitive["attributes"]["POSITION"])
+        triangles = read_accessor(document, data, primitive["indices"])
+        meshes.append(vertices[triangles.astype(np.int64)])
+
+    placed = {}
+    for index in document["nodes"][0]["children"]:
+        group = document["nodes"][index]
+        for child in group["children"]:
+            node = document["nodes"][child]
+            matrix = np.array(node.get("matrix", np.identity(4).ravel().tolist())).reshape(4, 4).T
+            corners = meshes[node["mesh"]] @ matrix[:3, :3].T + matrix[:3, 3]
+            placed.setdefault(group["name"], []).append(corners)
+    return {name: np.concatenate(corners) for name, corners in placed.items()}
+
+def read_stl(path):
+    return np.fromfile(path, dtype=STL_DTYPE, offset=84)["vertices"]
+
+def compare(name, model, out_dir, profile):
+    stl_path = os.path.join(out_dir, f"{name}.stl")
+    glb_path = os.path.join(out_dir, f"{name}.glb")
+
+    start = time.perf_counter()
+    model.export_stl_fast(stl_path, profile=profile)
+    stl_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stats = model.export_glb(glb_path, profile=profile)
+    glb_time = time.perf_counter() - start
+
+    stl_size = os.path.getsize(stl_path)
+    glb_size = os.path.getsize(glb_path)
+    print(f"{name:8} stl {stl_time:6.2f}s {stl_size / 1e6:7.2f} MB  glb {glb_time:6.2f}s {glb_size / 1e6:7.2f} MB  {glb_size / stl_size:6.1%}")
+    print(f"{'':8} {stats}")
+
+    fast = read_stl(stl_path)
+    groups = read_glb(glb_path)
+    for group, corners in groups.items():
+        print(f"{'':8} {group:>14} {len(corners):8} placed triangles")
+
+    placed = np.concatenate(list(groups.values()))
+    assert abs(len(placed) - len(fast)) <= len(fast) * 0.001
+    # glb positions are float32
+    assert np.allclose(placed.reshape(-1, 3).min(axis=0), fast.reshape(-1, 3).min(axis=0), atol=1e-2)
+    assert np.allclose(placed.reshape(-1, 3).max(axis=0), fast.reshape(-1, 3).max(axis=0), atol=1e-2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GLB preview size against STL")
+    parser.add_argument("-p", "--profile", default="standard", help="tolerance profile name")
+    args = parser.parse_args(argv)
+
+    out_dir = tempfile.mkdtemp()
+    compare("bunker", make_bunker(), out_dir, args.profile)
+    compare("catwalk", make_catwalk(), out_dir, args.profile)
+
+if __name__ == "__main__":
+    main()
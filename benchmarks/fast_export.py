@@ -0,0 +1,107 @@
+import os
+import tempfile
+import time
+import numpy as np
+import cadquery as cq
+from skirmishbunker import Bunker
+from skirmishbunker.fastExport import run_operations, shape_solids
+from skirmishbunker.stlStream import STL_DTYPE
+from cqterrain import tile
+
+# Compares build_plate + cq.exporters.export with Bunker.export_stl_fast
+# on the example/bunker.py configuration. The body rebuilt from
+# build_operations is checked against build_body by volume.
+
+def custom_windmill_tile(bunker):
+    windmill_tile = tile.windmill(
+        tile_size = bunker.floor_tile_size,
+        height = bunker.floor_tile_height,
+        padding = .5
+    )
+    return windmill_tile
+
+def make_bunker():
+    bp = Bunker()
+    bp.inset=15
+    bp.width=140
+    bp.length=110
+    bp.height=65
+
+    bp.render_panel_details=True
+    bp.panel_length=28
+    bp.panel_width = 6
+    bp.panel_padding = 4
+
+    bp.render_windows=True
+    bp.skip_windows = []
+    bp.window_length = 8
+    bp.window_height = 24
+    bp.window_frame_chamfer = 1.6
+    bp.window_frame_chamfer_select = "<Z"
+
+    bp.render_doors=True
+    bp.door_panels = [0]
+
+    bp.render_ladders=True
+    bp.ladder_panels = [8]
+
+    bp.render_floor_tiles=True
+    bp.render_roof=True
+
+    bp.floor_padding = -5
+    bp.floor_tile_padding=.5
+
+    bp.render_floor_cuts = True
+    bp.render_pips=True
+    bp.render_magnets=False
+
+    bp.custom_floor_tile = custom_windmill_tile
+
+    bp.make()
+    return bp
+
+def read_stl(path):
+    with open(path, "rb") as stl_file:
+        stl_file.seek(84)
+        return np.fromfile(stl_file, dtype=STL_DTYPE)
+
+def volume(scene):
+    return cq.Compound.makeCompound([val for val in scene.vals() if isinstance(val, cq.Shape)]).Volume()
+
+def bounds(records):
+    corners = records["vertices"].reshape(-1, 3)
+    return corners.min(axis=0), corners.max(axis=0)
+
+out_dir = tempfile.mkdtemp()
+bp = make_bunker()
+
+start = time.perf_counter()
+plate = bp.build_plate()
+build_time = time.perf_counter() - start
+
+start = time.perf_counter()
+cq.exporters.export(plate, os.path.join(out_dir, "export.stl"))
+export_time = time.perf_counter() - start
+
+start = time.perf_counter()
+stats = bp.export_stl_fast(os.path.join(out_dir, "fast.stl"))
+fast_time = time.perf_counter() - start
+
+exported = read_stl(os.path.join(out_dir, "export.stl"))
+fast = read_stl(os.path.join(out_dir, "fast.stl"))
+
+print(f"build_plate + export {build_time + export_time:6.2f}s ({build_time:.2f}s build, {export_time:.2f}s export) {len(exported)} triangles")
+print(f"export_stl_fast      {fast_time:6.2f}s {len(fast)} triangles")
+print(f"speedup              {(build_time + export_time) / fast_time:6.2f}x")
+print(stats)
+
+low, high = bounds(exported)
+fast_low, fast_high = bounds(fast)
+assert np.allclose(low, fast_low, atol=0.05) and np.allclose(high, fast_high, atol=0.05)
+print("bounds match")
+
+body_volume = volume(bp.build_body())
+operations = [(operation, shape_solids(shapes)) for operation, shapes in bp.build_operations()]
+operations_volume = volume(run_operations(operations))
+print(f"body volume {body_volume:.2f}, from build_operations {operations_volume:.2f}")
+assert abs(body_volume - operations_volume) <= body_volume * 1e-4
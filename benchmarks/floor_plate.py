@@ -0,0 +1,80 @@
+import argparse
+import json
+import time
+import cadquery as cq
+from skirmishbunker import Bunker
+from skirmishbunker.bunkerFloor import make_interior_floor
+
+# Compares the grid and sketch floor engines as the interior grows,
+# timing make_interior_floor and the build_body that fuses the tiles.
+#
+#   python benchmarks/floor_plate.py -s 100 160 220 -o floor.json
+
+def measure(shape):
+    solids = shape.solids().vals()
+    volume = sum(solid.Volume() for solid in solids)
+    bounds = cq.Compound.makeCompound(solids).BoundingBox()
+    return volume, bounds
+
+def make_bunker(size, engine):
+    bp = Bunker()
+    bp.length = size
+    bp.width = size
+    bp.render_windows = False
+    bp.render_doors = False
+    bp.floor_engine = engine
+    bp.make()
+    return bp
+
+def run(size, engine):
+    bp = make_bunker(size, engine)
+
+    start = time.perf_counter()
+    make_interior_floor(bp)
+    floor_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    body = bp.build_body()
+    body_time = time.perf_counter() - start
+
+    return {
+        "engine": engine,
+        "size": size,
+        "int_area": bp.int_length * bp.int_width,
+        "floor": floor_time,
+        "build_body": body_time,
+        "tile_volume": measure(bp.interior_tiles)[0],
+        "body_volume": measure(body)[0]
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="grid vs sketch floor engine")
+    parser.add_argument("-s", "--sizes", nargs="+", type=float, default=[100, 140, 180, 220])
+    parser.add_argument("-o", "--out", default=None, help="json results file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        grid = run(size, "grid")
+        sketch = run(size, "sketch")
+        results += [grid, sketch]
+
+        print(
+            f"int area {grid['int_area']:8.0f} "
+            f"floor {grid['floor']:6.2f}s -> {sketch['floor']:6.2f}s "
+            f"build_body {grid['build_body']:6.2f}s -> {sketch['build_body']:6.2f}s",
+            flush=True
+        )
+
+        tolerance = 1e-3
+        assert abs(grid["tile_volume"] - sketch["tile_volume"]) <= tolerance * grid["tile_volume"]
+        assert abs(grid["body_volume"] - sketch["body_volume"]) <= tolerance * grid["body_volume"]
+
+    print("sketch floor matches grid floor")
+
+    if args.out:
+        with open(args.out, "w") as out_file:
+            json.dump(results, out_file, indent=2)
+
+if __name__ == "__main__":
+    main()
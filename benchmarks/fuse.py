@@ -0,0 +1,40 @@
+import argparse
+import time
+import cadquery as cq
+from skirmishbunker.fuseShapes import fuse_shapes
+
+# Chained .union() against fuse_shapes as the number of shapes grows.
+# Overlapping cylinders take the balanced tree, disjoint ones the multi argument fuse.
+#
+#   python benchmarks/fuse.py --counts 4 16 64
+
+def cylinders(count, spacing):
+    cylinder = cq.Workplane("XY").cylinder(4, 2)
+    return [cylinder.translate((i * spacing, 0, 0)) for i in range(count)]
+
+def chained(shapes):
+    result = cq.Workplane("XY")
+    for shape in shapes:
+        result = result.union(shape)
+    return result
+
+def timed(function, shapes):
+    start = time.perf_counter()
+    result = function(shapes)
+    return time.perf_counter() - start, result.val().Volume()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="chained union vs fuse_shapes")
+    parser.add_argument("--counts", type=int, nargs="+", default=[4, 16, 64, 128])
+    args = parser.parse_args(argv)
+
+    for layout, spacing in (("overlapping", 3), ("disjoint", 5)):
+        for count in args.counts:
+            shapes = cylinders(count, spacing)
+            chain_time, chain_volume = timed(chained, shapes)
+            fuse_time, fuse_volume = timed(fuse_shapes, shapes)
+            assert abs(chain_volume - fuse_volume) < 1e-6 * chain_volume
+            print(f"{layout:11} {count:4} chained {chain_time:7.3f}s fuse_shapes {fuse_time:7.3f}s {chain_time / fuse_time:6.2f}x")
+
+if __name__ == "__main__":
+    main()
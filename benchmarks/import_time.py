@@ -0,0 +1,62 @@
+import argparse
+import json
+import subprocess
+import sys
+
+# Checks `import skirmishbunker` against a time budget and that it does not
+# pull in cadquery / OCC. Exits non zero when either check fails.
+# tests/test_import_time.py asserts the same budget in the test suite.
+#
+#   python benchmarks/import_time.py --budget 0.5
+
+HEAVY_MODULES = ["cadquery", "OCP", "cadqueryhelper", "cqterrain"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import skirmishbunker
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "loaded": [name for name in %r if name in sys.modules]
+}))
+""" % HEAVY_MODULES
+
+def measure(repeat):
+    runs = []
+    for i in range(repeat):
+        # a fresh interpreter each time, nothing cached in sys.modules
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            check=True,
+            capture_output=True,
+            text=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return runs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="import skirmishbunker time budget")
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds allowed for the import")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="best of n interpreters")
+    args = parser.parse_args(argv)
+
+    runs = measure(args.repeat)
+    best = min(run["seconds"] for run in runs)
+    loaded = sorted(set(name for run in runs for name in run["loaded"]))
+
+    print(f"import skirmishbunker {best * 1000:.1f}ms (budget {args.budget * 1000:.0f}ms)")
+    failed = False
+
+    if best > args.budget:
+        print("over budget")
+        failed = True
+
+    if loaded:
+        print(f"heavy modules imported eagerly: {', '.join(loaded)}")
+        failed = True
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
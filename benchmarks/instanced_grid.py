@@ -0,0 +1,49 @@
+import argparse
+import resource
+import sys
+import time
+from skirmishbunker import Bunker
+
+# Peak RSS and make time of a large bunker, the floor tiles are
+# located instances of one tile so memory follows the distinct tiles.
+#
+#   python benchmarks/instanced_grid.py --size 400
+
+def distinct(shape):
+    solids = shape.solids().vals()
+    unique = []
+    for solid in solids:
+        if not any(solid.wrapped.IsPartner(other.wrapped) for other in unique):
+            unique.append(solid)
+    return len(solids), len(unique)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="instanced floor tile grid memory")
+    parser.add_argument("--size", type=float, default=400, help="bunker length and width in mm")
+    parser.add_argument("--build", action="store_true", help="also run build()")
+    args = parser.parse_args(argv)
+
+    bp = Bunker()
+    bp.length = args.size
+    bp.width = args.size
+    bp.render_windows = False
+    bp.render_doors = False
+
+    start = time.perf_counter()
+    bp.make()
+    print(f"make  {time.perf_counter() - start:7.2f}s")
+
+    if args.build:
+        start = time.perf_counter()
+        bp.build()
+        print(f"build {time.perf_counter() - start:7.2f}s")
+
+    solids, unique = distinct(bp.interior_tiles)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        rss *= 1024
+    print(f"floor tile solids {solids}, distinct {unique}")
+    print(f"peak rss {rss / 2**20:.1f} MB")
+
+if __name__ == "__main__":
+    main()
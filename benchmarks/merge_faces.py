@@ -0,0 +1,71 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+# Build time, B-rep faces / edges and STL triangles of a bunker's body and
+# roof with and without merge_faces. Each run is made in a fresh process.
+#
+#   python benchmarks/merge_faces.py
+
+def measure(merge):
+    from skirmishbunker import Bunker, stream_stl
+    from skirmishbunker.faceMerge import face_edge_counts
+
+    bp = Bunker()
+    bp.render_windows = True
+    bp.render_doors = True
+    bp.render_ladders = True
+    bp.ladder_panels = [1]
+    bp.render_floor_cuts = True
+    bp.render_pips = True
+    bp.merge_faces = merge
+    bp.make()
+
+    start = time.perf_counter()
+    body = bp.build_body()
+    body_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    roof = bp.roof_bp.build()
+    roof_time = time.perf_counter() - start
+
+    handle, path = tempfile.mkstemp(suffix=".stl")
+    os.close(handle)
+    stats = stream_stl({"body": body, "roof": roof}, path)
+    os.remove(path)
+
+    return {
+        "body_seconds": body_time,
+        "roof_seconds": roof_time,
+        "body_counts": face_edge_counts(body.vals()),
+        "roof_counts": face_edge_counts(roof.vals()),
+        "triangles": {name: component["triangles"] for name, component in stats["components"].items()},
+        "stages": (bp.merge_stats or []) + (bp.roof_bp.merge_stats or [])
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="merge_faces face counts and timings")
+    parser.parse_args(argv)
+
+    context = multiprocessing.get_context("spawn")
+    for merge in (False, True):
+        with context.Pool(1) as pool:
+            stats = pool.apply(measure, (merge,))
+
+        label = "merge" if merge else "clean"
+        for name in ("body", "roof"):
+            faces, edges = stats[f"{name}_counts"]
+            print(
+                f"{label:>6} {name:>5} {stats[f'{name}_seconds']:6.2f}s "
+                f"{faces:6} faces {edges:6} edges {stats['triangles'][name]:8} triangles"
+            )
+        for stage in stats["stages"]:
+            print(
+                f"{'':>6} {stage['stage']:>12} faces {stage['faces_before']:6} -> {stage['faces_after']:6}"
+                f" edges {stage['edges_before']:6} -> {stage['edges_after']:6} {stage['seconds']:6.3f}s"
+            )
+
+if __name__ == "__main__":
+    main()
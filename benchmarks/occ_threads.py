@@ -0,0 +1,74 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from suite import GENERATORS
+
+# make, build and STL export time per generator with OCC's boolean and mesh
+# threading set through performance_config, each run in a fresh process.
+#
+#   python benchmarks/occ_threads.py --threads 1 4 16 --scale 2
+#   python benchmarks/occ_threads.py --glue shift --fuzzy 1e-5
+
+def measure(name, scale, settings):
+    import cadquery as cq
+    import skirmishbunker
+    from skirmishbunker import performance_config, stream_stl
+
+    performance_config.configure(**settings)
+    bp = getattr(skirmishbunker, name)()
+    GENERATORS[name](bp, scale)
+
+    start = time.perf_counter()
+    bp.make()
+    make_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = bp.build()
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    handle, path = tempfile.mkstemp(suffix=".stl")
+    os.close(handle)
+    stats = stream_stl(result, path)
+    os.remove(path)
+    export_time = time.perf_counter() - start
+
+    volume = cq.Compound.makeCompound(result.vals()).Volume()
+    return make_time, build_time, export_time, stats["triangles"], volume
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCC thread count per generator")
+    parser.add_argument("-g", "--generators", nargs="+", default=["Bunker", "FlatRoof", "DetailedRoof", "Catwalk"], choices=list(GENERATORS))
+    parser.add_argument("-t", "--threads", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("-s", "--scale", type=float, default=1)
+    parser.add_argument("--glue", default="off", choices=["off", "shift", "full"])
+    parser.add_argument("--fuzzy", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    print(f"{os.cpu_count()} logical cpus")
+    context = multiprocessing.get_context("spawn")
+    for name in args.generators:
+        baseline = None
+        for threads in args.threads:
+            settings = {
+                "threads": threads,
+                "parallel_boolean": threads > 1,
+                "parallel_mesh": threads > 1,
+                "glue": args.glue,
+                "fuzzy_value": args.fuzzy
+            }
+            with context.Pool(1) as pool:
+                make_time, build_time, export_time, triangles, volume = pool.apply(measure, (name, args.scale, settings))
+
+            total = make_time + build_time + export_time
+            baseline = baseline or total
+            print(
+                f"{name:>12} {threads:3} threads "
+                f"make {make_time:7.2f}s build {build_time:7.2f}s export {export_time:7.2f}s "
+                f"({baseline / total:5.2f}x) {triangles} triangles volume {volume:.1f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import tempfile
+import time
+from skirmishbunker import Bunker
+
+# Bunker.export_plate_parts with one worker process per part against the same
+# parts exported one after another. With enough cpus the process total should
+# come close to the slowest single part.
+#
+#   python benchmarks/plate_parts.py --size 200
+
+def make_bunker(size):
+    bp = Bunker()
+    bp.length = size
+    bp.width = size
+    bp.render_panel_details = True
+    bp.render_windows = True
+    bp.render_doors = True
+    bp.render_ladders = True
+    bp.ladder_panels = [1]
+    bp.render_floor_cuts = True
+    bp.render_pips = True
+    bp.make()
+    return bp
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="parallel plate part export")
+    parser.add_argument("--size", type=float, default=110, help="bunker length and width in mm")
+    args = parser.parse_args(argv)
+
+    bp = make_bunker(args.size)
+    for executor in ("serial", "process"):
+        start = time.perf_counter()
+        manifest = bp.export_plate_parts(tempfile.mkdtemp(), executor=executor)
+        total = time.perf_counter() - start
+
+        print(f"{executor}: {total:.2f}s")
+        slowest = 0
+        for part in manifest["parts"]:
+            seconds = part.get("build_seconds", 0) + part.get("mesh_seconds", 0)
+            slowest = max(slowest, seconds)
+            print(f"  {part['name']:>14} {seconds:7.2f}s {part.get('triangles', 0):8} triangles {part.get('bytes', 0) / 1e6:6.2f} MB")
+        print(f"  slowest part {slowest:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import time
+import cadquery as cq
+from skirmishbunker import FlatRoof, DetailedRoof, component_library
+from skirmishbunker.roofTiles import make_slotted_tile
+
+# Compares the sketch based slotted roof tile against the previous
+# five slot2D extrusions and five cuts, then times FlatRoof / DetailedRoof
+# tile making with a cold and a warm component library.
+
+def legacy_flat_tile(bp):
+    slot_translate = bp._calc_slot_translation()
+    slot_radius = bp._calc_slot_radius()
+    tile = cq.Workplane("XY").box(bp.tile_size, bp.tile_size, bp.tile_height)
+
+    for length, offset in [
+        (bp.tile_size, 0),
+        (bp._calc_slot_length_md(), -slot_translate),
+        (bp._calc_slot_length_md(), slot_translate),
+        (bp._calc_slot_length_sm(), -slot_translate * 2),
+        (bp._calc_slot_length_sm(), slot_translate * 2)
+    ]:
+        slot = (cq.Workplane("XY")
+            .slot2D(length, slot_radius)
+            .extrude(bp.tile_height * 2)
+            .rotate((0, 0, 1), (0, 0, 0), 45)
+            .translate((offset, offset, 0 - (bp.tile_height / 2))))
+        tile = tile.cut(slot)
+    return tile
+
+def legacy_detailed_tile(bp):
+    tile_size = 21
+    tile_height = bp.tile_height
+    tile = cq.Workplane("XY").box(tile_size, tile_size, tile_height)
+
+    for length, offset in [(21, 0), (14, -3), (14, 3), (7, -6), (7, 6)]:
+        slot = cq.Workplane("XY").slot2D(length, 2).extrude(tile_height).rotate((0,0,1),(0,0,0),45).translate((offset, offset, 0))
+        tile = tile.cut(slot)
+    return tile
+
+def difference(a, b):
+    a = a.val()
+    b = b.val()
+    return a.cut(b).Volume() + b.cut(a).Volume()
+
+def time_call(function, repeat=20):
+    start = time.perf_counter()
+    for i in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+flat = FlatRoof()
+detailed = DetailedRoof()
+
+legacy_time, legacy = time_call(lambda: legacy_flat_tile(flat))
+sketch_time, sketch = time_call(lambda: make_slotted_tile(flat.tile_size, flat.tile_height, flat._tile_slots()))
+print(f"FlatRoof tile     legacy {legacy_time * 1000:6.1f}ms sketch {sketch_time * 1000:6.1f}ms difference {difference(legacy, sketch):.6f}")
+assert difference(legacy, sketch) < 1e-6
+
+slots = [(21, 2, 0), (14, 2, -3), (14, 2, 3), (7, 2, -6), (7, 2, 6)]
+legacy_time, legacy = time_call(lambda: legacy_detailed_tile(detailed))
+sketch_time, sketch = time_call(lambda: make_slotted_tile(21, detailed.tile_height, slots, detailed.tile_height / 2))
+print(f"DetailedRoof tile legacy {legacy_time * 1000:6.1f}ms sketch {sketch_time * 1000:6.1f}ms difference {difference(legacy, sketch):.6f}")
+assert difference(legacy, sketch) < 1e-6
+
+for roof_class in [FlatRoof, DetailedRoof]:
+    component_library.clear()
+    timings = []
+    for i in range(3):
+        bp = roof_class()
+        bp.render_tiles = True
+        bp.make()
+        start = time.perf_counter()
+        bp._make_tiles()
+        timings.append(time.perf_counter() - start)
+    print(f"{roof_class.__name__:>12} _make_tiles cold {timings[0] * 1000:6.1f}ms warm {min(timings[1:]) * 1000:6.1f}ms")
@@ -0,0 +1,54 @@
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+# Peak RSS and time of cq.exporters.export against stream_stl on a large bunker.
+# Each export runs in a fresh process, the growth in peak RSS is what the export added.
+#
+#   python benchmarks/stream_stl.py --size 300 --max-faces 500
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run(method, size, max_faces, path, queue):
+    import cadquery as cq
+    from skirmishbunker import Bunker, stream_stl
+
+    bp = Bunker()
+    bp.length = size
+    bp.width = size
+    bp.make()
+    plate = bp.build_plate()
+    before = peak_rss_mb()
+
+    start = time.perf_counter()
+    if method == "export":
+        cq.exporters.export(plate, path)
+    else:
+        stream_stl(plate, path, max_faces=max_faces)
+    seconds = time.perf_counter() - start
+
+    queue.put((seconds, peak_rss_mb() - before, os.path.getsize(path)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="cq.exporters.export vs stream_stl")
+    parser.add_argument("--size", type=float, default=300, help="bunker length and width in mm")
+    parser.add_argument("--max-faces", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context("spawn")
+    out_dir = tempfile.mkdtemp()
+    for method in ("export", "stream_stl"):
+        queue = context.Queue()
+        path = os.path.join(out_dir, f"{method}.stl")
+        process = context.Process(target=run, args=(method, args.size, args.max_faces, path, queue))
+        process.start()
+        seconds, rss, size = queue.get()
+        process.join()
+        print(f"{method:10} {seconds:7.2f}s peak RSS +{rss:7.1f} MB {size / 1e6:7.1f} MB file")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+# Times make() and build() for every generator while sweeping length / width,
+# so panel and tile counts grow with the scale. Each measurement runs in a
+# fresh spawned process, peak RSS is that process's high water mark.
+#
+#   python benchmarks/suite.py -o results.json
+#   python benchmarks/suite.py -o new.json --compare results.json
+
+SCALES = [1, 1.5, 2, 3]
+
+def configure_bunker(bp, scale):
+    bp.length = 100 * scale
+    bp.width = 100 * scale
+    bp.render_windows = True
+    bp.render_doors = True
+    bp.render_floor_tiles = True
+    bp.render_floor_cuts = True
+    bp.render_pips = True
+
+def configure_roof(bp, scale):
+    bp.length = 160 * scale
+    bp.width = 150 * scale
+    bp.render_tiles = True
+    bp.cut_holes = True
+
+def configure_catwalk(bp, scale):
+    bp.length = 187 * scale
+    bp.width = 187 * scale
+    bp.interior_length = 130 * scale
+    bp.interior_width = 130 * scale
+
+def configure_part(bp, scale):
+    bp.length = bp.length * scale
+    bp.width = bp.width * scale
+
+GENERATORS = {
+    "Bunker": configure_bunker,
+    "FlatRoof": configure_roof,
+    "DetailedRoof": configure_roof,
+    "Catwalk": configure_catwalk,
+    "Hatch": configure_part,
+    "BlastDoor": configure_part,
+    "SplitDoor": configure_part
+}
+
+def peak_rss():
+    # kilobytes on linux, bytes on macos
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss = rss // 1024
+    return rss * 1024
+
+def measure(name, scale, repeat):
+    import skirmishbunker
+
+    make_times = []
+    build_times = []
+    for i in range(repeat):
+        bp = getattr(skirmishbunker, name)()
+        GENERATORS[name](bp, scale)
+
+        start = time.perf_counter()
+        bp.make()
+        make_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        result = bp.build()
+        build_times.append(time.perf_counter() - start)
+
+    solids = result.solids().vals()
+    return {
+        "generator": name,
+        "scale": scale,
+        "length": bp.length,
+        "width": bp.width,
+        "make": min(make_times),
+        "build": min(build_times),
+        "solids": len(solids),
+        "faces": sum(len(solid.Faces()) for solid in solids),
+        "peak_rss": peak_rss()
+    }
+
+def run_isolated(name, scale, repeat):
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(measure, (name, scale, repeat))
+
+def versions():
+    from importlib.metadata import version, PackageNotFoundError
+
+    found = {}
+    for package in ["skirmishbunker", "cadquery", "cqterrain", "cadqueryhelper"]:
+        try:
+            found[package] = version(package)
+        except PackageNotFoundError:
+            found[package] = None
+    return found
+
+def compare(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    previous = {(entry["generator"], entry["scale"]): entry for entry in baseline["results"]}
+    print(f"\ncompared to {baseline_path} {baseline['versions']}")
+    for entry in results:
+        old = previous.get((entry["generator"], entry["scale"]))
+        if not old:
+            continue
+        old_total = old["make"] + old["build"]
+        new_total = entry["make"] + entry["build"]
+        print(
+            f"{entry['generator']:>12} x{entry['scale']:<4} "
+            f"{old_total:8.2f}s -> {new_total:8.2f}s "
+            f"({new_total / old_total:5.2f}x) "
+            f"rss {old['peak_rss'] / 2**20:7.1f} -> {entry['peak_rss'] / 2**20:7.1f} MB"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="skirmishbunker make / build scaling benchmarks")
+    parser.add_argument("-o", "--out", default="benchmark_results.json", help="json results file")
+    parser.add_argument("-g", "--generators", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument("-s", "--scales", nargs="+", type=float, default=SCALES, help="length / width multipliers")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="best of n runs")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.generators:
+        for scale in args.scales:
+            entry = run_isolated(name, scale, args.repeat)
+            results.append(entry)
+            print(
+                f"{name:>12} x{scale:<4} make {entry['make']:7.2f}s "
+                f"build {entry['build']:7.2f}s faces {entry['faces']:6} "
+                f"rss {entry['peak_rss'] / 2**20:7.1f} MB",
+                flush=True
+            )
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": versions(),
+        "repeat": args.repeat,
+        "results": results
+    }
+
+    with open(args.out, "w") as out_file:
+        json.dump(report, out_file, indent=2)
+    print(f"wrote {args.out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+# Triangle count, file size and meshing time of a bunker's body and roof
+# for every tolerance profile, each profile meshed in a fresh process so no
+# triangulation is carried over from a finer one.
+#
+#   python benchmarks/tolerance_profiles.py --profiles draft standard fine
+
+def measure(profile):
+    from skirmishbunker import Bunker, stream_stl
+
+    bp = Bunker()
+    bp.render_windows = True
+    bp.render_doors = True
+    bp.render_ladders = True
+    bp.ladder_panels = [1]
+    bp.render_floor_cuts = True
+    bp.render_pips = True
+    bp.make()
+    components = {"body": bp.build_body(), "roof": bp.roof_bp.build()}
+
+    handle, path = tempfile.mkstemp(suffix=".stl")
+    os.close(handle)
+    start = time.perf_counter()
+    stats = stream_stl(components, path, profile=profile)
+    stats["seconds"] = time.perf_counter() - start
+    stats["bytes"] = os.path.getsize(path)
+    os.remove(path)
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="tolerance profile triangle counts and timings")
+    parser.add_argument("-p", "--profiles", nargs="+", default=["draft", "standard", "fine"])
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context("spawn")
+    for profile in args.profiles:
+        with context.Pool(1) as pool:
+            stats = pool.apply(measure, (profile,))
+
+        print(f"{profile:>9} {stats['triangles']:8} triangles {stats['bytes'] / 1e6:6.2f} MB {stats['seconds']:6.2f}s")
+        for name, component in stats["components"].items():
+            print(f"{'':>9} {name:>6} {component['triangles']:8} triangles {component['seconds']:6.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -19,17 +19,28 @@ from .FlatRoof import FlatRoof
 from .SeriesHelper import SeriesHelper
 from math import floor as math_floor
 
-from .bunkerBody import init_body_params, make_wedge, make_interior_rectangle, make_base
-from .bunkerPanels import init_bunker_params, make_cut_panels, arch_detail, make_detail_panels
-from .bunkerWindows import init_window_params, make_cut_windows, make_windows
-from .bunkerDoors import init_door_params, make_cut_doors, make_doors
-from .bunkerRoof import init_roof_params, make_roof
-from .bunkerFloor import init_floor_params, make_interior_floor
-from .bunkerLadders import init_ladder_params, make_ladders
-from .bunkerFloorCuts import init_floor_cut, make_floor_cuts
-from .bunkerPips import init_pip_params, make_pips, make_cut_pips
-
-class Bunker(Base):
+from .bunkerBody import init_body_params
+from .bunkerPanels import init_bunker_params
+from .bunkerWindows import init_window_params
+from .bunkerDoors import init_door_params
+from .bunkerRoof import init_roof_params
+from .bunkerFloor import init_floor_params
+from .bunkerLadders import init_ladder_params
+from .bunkerFloorCuts import init_floor_cut
+from .bunkerPips import init_pip_params, roof_hole_fit
+from .bunkerStages import BUNKER_STAGES, stage_enabled, dirty_stages, forget_stale_stages
+from .TrackedParams import TrackedParams
+from .Instrumentation import instrument
+from .StageScheduler import StageScheduler
+from .tileCulling import cull_tiles
+from .fastExport import fast_export_stl, component_parts
+from .export3mf import export_3mf
+from .exportGlb import export_glb
+from .partExport import operations_without, export_part_files
+from .faceMerge import merge_faces
+from .fuseShapes import fuse_touching
+
+class Bunker(TrackedParams, Base):
     def __init__(self):
         super().__init__()
 
@@ -43,6 +54,20 @@ class Bunker(Base):
         init_floor_cut(self)
         init_pip_params(self)
 
+        # optional StageCache shared between runs
+        self.stage_cache = None
+
+        # "serial", "thread", "process" or a concurrent.futures Executor,
+        # anything but serial is experimental and not measured faster
+        self.stage_executor = "serial"
+        self.stage_workers = None
+
+        # only re-run the stages whose parameters changed since the last make
+        self.incremental_make = False
+        self.made_stages = set()
+
+        self.clear_changed()
+
     def make_series(self, shape, length_offset, x_translate = 0, y_translate = 0, z_translate = 0, skip_list = None, keep_list = None):
         series = SeriesHelper()
         series.shape = shape
@@ -70,86 +95,271 @@ class Bunker(Base):
         super().make()
         self.angle = roof.angle(self.inset, self.height)
 
-        # order matters
-        make_wedge(self)
-        make_interior_rectangle(self)
+        # stage dependencies are declared in BUNKER_STAGES
+        stages = [stage for stage in BUNKER_STAGES if stage_enabled(self, stage)]
+        if self.incremental_make:
+            stages = dirty_stages(self, stages)
+
+        scheduler = StageScheduler(self.stage_executor, self.stage_workers)
+        with instrument("Bunker.make"):
+            scheduler.run(self, stages)
+
+        ran = {stage["name"] for stage in stages}
+        forget_stale_stages(self, ran)
+        self.made_stages.update(ran)
+        self.clear_changed()
+        self.roof_object.clear_changed()
+
+    def tiles_precut(self):
+        '''
+        True when body_tiles already has the floor cuts applied and goes in after them.
+        '''
+        return bool(self.cull_covered_tiles and self.interior_tiles and self.render_floor_cuts and self.floor_cuts)
+
+    def body_tiles(self):
+        tiles = self.interior_tiles
+        self.tile_cull_stats = None
+
+        if self.tiles_precut():
+            tiles, self.tile_cull_stats = cull_tiles(tiles, self.floor_cuts)
+
+        return tiles
+
+    def roof_hole_fit(self):
+        '''
+        Offset and clearance of the pips in the roof holes, from the point patterns alone.
+        '''
+        return roof_hole_fit(self)
+
+    def body_tool_groups(self):
+        '''
+        The build_body tools grouped so each group can be applied as one step by export_stl_fast.
+        Wedge and base, shell cuts, additive details, cuts through the floor,
+        floor tiles the floor cuts were already applied to, then ladders.
+        Tools that switch groups never touch, so the result matches build_body.
+        The precut tiles only touch the floor, their group is a "touch" union.
+        '''
+        body = [self.wedge]
+        shell_cuts = []
+        details = []
+        floor_cuts = []
+        after_cuts = []
+        ladders = []
 
-        if self.render_base:
-            make_base(self)
+        if self.render_interior:
+            shell_cuts.append(self.interior_rectangle)
 
-        if self.render_cut_panels:
-            # depends on make_interior_rectangle
-            make_cut_panels(self)
+        if self.render_base and self.base:
+            # the cut panels notch the top of the base
+            body.append(self.base)
 
-        if self.render_panel_details:
-            make_detail_panels(self)
+        if self.render_cut_panels and self.cut_panels:
+            shell_cuts.append(self.cut_panels)
 
-        if self.render_windows:
-            make_cut_windows(self)
-            make_windows(self)
+        if self.render_pips and self.pips:
+            if self.render_magnets:
+                shell_cuts.append(self.pips)
+            else:
+                details.append(self.pips)
+            floor_cuts.append(self.cut_pips)
 
-        if self.render_doors:
-            make_cut_doors(self)
-            make_doors(self)
+        if self.render_windows and self.cut_windows and self.windows:
+            shell_cuts.append(self.cut_windows)
+            details.append(self.windows)
 
-        if self.render_ladders:
-            make_ladders(self)
+        if self.render_doors and self.cut_doors and self.doors:
+            shell_cuts.append(self.cut_doors)
+            details.append(self.doors)
 
-        if self.render_roof:
-            make_roof(self)
+        if self.render_floor_tiles and self.interior_tiles:
+            tiles = self.body_tiles()
+            if tiles and self.tiles_precut():
+                after_cuts.append(tiles)
+            elif tiles:
+                details.append(tiles)
 
-        if self.render_floor_tiles:
-            make_interior_floor(self)
+        if self.render_floor_cuts and self.floor_cuts:
+            floor_cuts.append(self.floor_cuts)
 
-        if self.render_floor_cuts:
-            make_floor_cuts(self)
+        if self.render_ladders and self.ladders:
+            ladders.append(self.ladders)
 
-        if self.render_pips:
-            make_pips(self)
-            make_cut_pips(self)
+        return [
+            ("union", body),
+            ("cut", shell_cuts),
+            ("union", details),
+            ("cut", floor_cuts),
+            ("touch", after_cuts),
+            ("union", ladders)
+        ]
 
     def build_body(self):
-        scene = (
-            cq.Workplane("XY")
-            .union(self.wedge)
-        )
+        with instrument("Bunker.build_body") as record:
+            clean = not self.merge_faces
+            self.merge_stats = [] if self.merge_faces else None
 
-        if self.render_interior:
-            scene = scene.cut(self.interior_rectangle)
+            scene = (
+                cq.Workplane("XY")
+                .union(self.wedge, clean=clean)
+            )
 
-        if self.render_base and self.base:
-            scene = scene.union(self.base)
+            if self.render_interior:
+                scene = scene.cut(self.interior_rectangle, clean=clean)
 
-        if self.render_cut_panels and self.cut_panels:
-            scene = scene.cut(self.cut_panels)
+            if self.render_base and self.base:
+                scene = scene.union(self.base, clean=clean)
 
-        if self.render_pips and self.pips:
-            if self.render_magnets:
-                scene = scene.cut(self.pips)
-            else:
-                scene = scene.union(self.pips)
-            scene = scene.cut(self.cut_pips)
+            if self.render_cut_panels and self.cut_panels:
+                scene = scene.cut(self.cut_panels, clean=clean)
 
-        if self.render_windows and self.cut_windows and self.windows:
-            scene = scene.cut(self.cut_windows).union(self.windows)
+            if self.render_pips and self.pips:
+                if self.render_magnets:
+                    scene = scene.cut(self.pips, clean=clean)
+                else:
+                    scene = scene.union(self.pips, clean=clean)
+                scene = scene.cut(self.cut_pips, clean=clean)
 
-        if self.render_doors and self.cut_doors and self.doors:
-            scene = scene.cut(self.cut_doors).union(self.doors)
+            if self.render_windows and self.cut_windows and self.windows:
+                scene = scene.cut(self.cut_windows, clean=clean).union(self.windows, clean=clean)
 
-        if self.render_floor_tiles and self.interior_tiles:
-            scene = scene.union(self.interior_tiles)
+            if self.render_doors and self.cut_doors and self.doors:
+                scene = scene.cut(self.cut_doors, clean=clean).union(self.doors, clean=clean)
 
-        if self.render_floor_cuts and self.floor_cuts:
-            scene = scene.cut(self.floor_cuts)
+            tiles = None
+            if self.render_floor_tiles and self.interior_tiles:
+                tiles = self.body_tiles()
+                if tiles and not self.tiles_precut():
+                    scene = fuse_touching(scene, tiles, clean=clean)
 
-        if self.render_ladders and self.ladders:
-            scene = scene.union(self.ladders)
+            if self.render_floor_cuts and self.floor_cuts:
+                scene = scene.cut(self.floor_cuts, clean=clean)
 
-        if self.render_panel_details and self.panels:
-            scene = scene.add(self.panels)
+            if tiles and self.tiles_precut():
+                scene = fuse_touching(scene, tiles, clean=clean)
+
+            if self.render_ladders and self.ladders:
+                scene = scene.union(self.ladders, clean=clean)
+
+            if self.merge_faces:
+                scene = merge_faces(scene, "body", self.merge_stats)
+
+            if self.render_panel_details and self.panels:
+                scene = scene.add(self.panels)
+            record.outputs(scene)
 
         return scene
 
+    def build_operations(self):
+        '''
+        The steps of build_body as (operation, shapes), used by export_stl_fast.
+        '''
+        operations = list(self.body_tool_groups())
+
+        if self.render_panel_details and self.panels:
+            operations.append(("add", [self.panels]))
+
+        return operations
+
+    def export_parts(self, plate=False):
+        '''
+        The body and roof as fastExport parts, the roof placed the way build() places it,
+        or the way build_plate() does when plate is set, without changing the roof translate.
+        '''
+        parts = [(self.build_operations(), (0, 0, 0), "body")]
+
+        if self.render_roof and self.roof_bp:
+            roof_x_translate, roof_z_translate = self.plate_translate() if plate else (self.roof_x_translate, self.roof_z_translate)
+            x_translate = 0
+            z_translate = self.height/2+self.roof_bp.height/2
+            if roof_x_translate != None and roof_z_translate:
+                x_translate += roof_x_translate
+                z_translate += roof_z_translate
+            parts.append((self.roof_bp.build_operations(), (x_translate, 0, z_translate), "roof"))
+
+        return parts
+
+    def plate_parts(self):
+        '''
+        build_plate() as separately printed parts, a list of (name, operations, translate).
+        Doors, ladders and detail panels come out of the body and hatches out of the roof,
+        the body and roof keep the cuts made for them.
+        '''
+        exported = self.export_parts(plate=True)
+        parts = []
+
+        separate = [
+            ("doors", self.render_doors and self.doors),
+            ("ladders", self.render_ladders and self.ladders),
+            ("detail_panels", self.render_panel_details and self.panels)
+        ]
+        body_operations = operations_without(exported[0][0], [shape for _, shape in separate if shape])
+        parts.append(("body", body_operations, (0, 0, 0)))
+        parts.extend((name, [("add", [shape])], (0, 0, 0)) for name, shape in separate if shape)
+
+        if len(exported) > 1:
+            roof_operations, roof_translate, _ = exported[1]
+            hatches = self.roof_bp.render_hatches and self.roof_bp.hatches
+            if hatches:
+                roof_operations = operations_without(roof_operations, [hatches])
+            parts.append(("roof", roof_operations, roof_translate))
+            if hatches:
+                parts.append(("hatches", [("add", [hatches])], roof_translate))
+
+        return parts
+
+    def export_plate_parts(self, out_dir, tolerance=0.1, angular_tolerance=0.1, profile=None, executor="process", workers=None):
+        '''
+        Writes each of plate_parts() to out_dir as its own STL from its own worker,
+        along with a manifest.json of file sizes and timings.
+        '''
+        with instrument("Bunker.export_plate_parts"):
+            return export_part_files(self.plate_parts(), out_dir, tolerance, angular_tolerance, profile, executor, workers)
+
+    def export_stl_fast(self, path, tolerance=0.1, angular_tolerance=0.1, profile=None):
+        '''
+        Writes build() to path as binary STL. Tiles, panels, windows, doors, ladders
+        and roof decorations that no later cut reaches are meshed once per distinct
+        shape and copied to every placement instead of being fused into the body.
+        '''
+        with instrument("Bunker.export_stl_fast"):
+            return fast_export_stl(self.export_parts(), path, tolerance, angular_tolerance, profile)
+
+    def export_3mf(self, path, tolerance=0.1, angular_tolerance=0.1, profile=None, plate=False):
+        '''
+        Writes build(), or build_plate() when plate is set, to path as 3MF.
+        Each distinct component mesh is stored once and placed by transform.
+        '''
+        with instrument("Bunker.export_3mf"):
+            return export_3mf(self.export_parts(plate), path, tolerance, angular_tolerance, profile)
+
+    def preview_components(self):
+        '''
+        (name, shape) of the body decorations export_glb groups on their own.
+        '''
+        return [
+            ("doors", self.render_doors and self.doors),
+            ("windows", self.render_windows and self.windows),
+            ("tiles", self.render_floor_tiles and self.interior_tiles),
+            ("ladders", self.render_ladders and self.ladders),
+            ("panels", self.render_panel_details and self.panels)
+        ]
+
+    def export_glb(self, path, tolerance=0.1, angular_tolerance=0.1, profile=None, plate=False):
+        '''
+        Writes build(), or build_plate() when plate is set, to path as GLB for previews.
+        Each distinct mesh is stored once and placed by instanced nodes, grouped as
+        body, doors, windows, tiles, ladders, panels, roof and the roof's own components.
+        '''
+        with instrument("Bunker.export_glb"):
+            exported = self.export_parts(plate)
+            parts = component_parts(exported[0], self.preview_components())
+            if len(exported) > 1:
+                roof_parts = component_parts(exported[1], self.roof_bp.preview_components())
+                parts.extend(roof_parts[:1])
+                # the roof's tiles are not the body's tiles
+                parts.extend((operations, translate, f"roof_{name}") for operations, translate, name in roof_parts[1:])
+            return export_glb(parts, path, tolerance, angular_tolerance, profile)
+
     def build_roof(self, z_translate=0):
         self.roof = self.roof_bp.build().translate((0, 0, z_translate))
 
@@ -165,14 +375,20 @@ class Bunker(Base):
     def build(self):
         super().build()
 
-        scene = self.build_body()
+        with instrument("Bunker.build") as record:
+            scene = self.build_body()
 
-        if self.render_roof and self.roof_bp:
-            scene.add(self.build_roof(z_translate = self.height/2+self.roof_bp.height/2))
+            if self.render_roof and self.roof_bp:
+                scene.add(self.build_roof(z_translate = self.height/2+self.roof_bp.height/2))
+
+            record.outputs(scene)
 
         return scene
 
-    def build_plate(self):
+    def plate_translate(self):
+        '''
+        The roof_x_translate / roof_z_translate that lay the roof next to the body.
+        '''
         x_translate = self.length
 
         if self.inset < 0:
@@ -180,8 +396,12 @@ class Bunker(Base):
         if self.inset == 0:
             x_translate = self.length + 15
 
+        return x_translate, -1 * (self.height + self.base_height)
+
+    def set_plate_translate(self):
         if self.render_roof and self.roof_bp:
-            self.roof_x_translate = x_translate
-            self.roof_z_translate = -1 * (self.height + self.base_height)
+            self.roof_x_translate, self.roof_z_translate = self.plate_translate()
 
+    def build_plate(self):
+        self.set_plate_translate()
         return self.build()
@@ -13,8 +13,16 @@
 # limitations under the License.
 
 import cadquery as cq
-from cadqueryhelper import Base, shape, grid, series
+from cadqueryhelper import Base, shape, series
 import math
+from .Instrumentation import instrument
+from .instancedGrid import grid_locations, instances
+from .tileCulling import box_bounds, moved_bounds, classify_in_ring
+from .fastExport import fast_export_stl, component_parts
+from .export3mf import export_3mf
+from .exportGlb import export_glb
+from .fuseShapes import fuse_shapes
+from .pointPattern import corner_points, make_cylinders
 
 class Catwalk(Base):
     def __init__(self):
@@ -88,21 +96,21 @@ class Catwalk(Base):
             .cut(overlap_cut.translate((0,0,-1*(self.height/2 - self.interior_height/2))))
         )
 
-    def __make_magnet_cuts(self):
-        magnet = cq.Workplane("XY").cylinder(self.magnet_height, self.magnet_radius+.1)
-
-        x_translate = self.interior_length/2-self.magnet_radius-self.magnet_padding
-        y_translate = self.interior_width/2-self.magnet_radius-self.magnet_padding
-        z_translate = -1*(self.height/2 - self.magnet_height/2)
+    def magnet_points(self):
+        return corner_points(
+            self.interior_length,
+            self.interior_width,
+            self.magnet_padding,
+            self.magnet_radius
+        )
 
-        pips = (
-            cq.Workplane("XY")
-            .union(magnet.translate((x_translate, y_translate, z_translate)))
-            .union(magnet.translate((-1*x_translate, y_translate, z_translate)))
-            .union(magnet.translate((-1*x_translate, -1*y_translate, z_translate)))
-            .union(magnet.translate((x_translate, -1*y_translate, z_translate)))
+    def __make_magnet_cuts(self):
+        self.cut_magnets = make_cylinders(
+            self.magnet_points(),
+            self.magnet_height,
+            self.magnet_radius+.1,
+            -1*(self.height/2 - self.magnet_height/2)
         )
-        self.cut_magnets = pips
 
     def __make_corner_walls(self):
         wall = (
@@ -132,13 +140,12 @@ class Catwalk(Base):
         wall = wall.cut(arch_cuts)
 
         corner = (
-            cq.Workplane("XY")
-            .union(wall.translate((-1*(self.wall_length/2-self.wall_width/2),0,0)))
-            .union(
+            fuse_shapes([
+                wall.translate((-1*(self.wall_length/2-self.wall_width/2),0,0)),
                 wall
                 .translate((-1*(self.wall_length/2-self.wall_width/2),0,0))
                 .rotate((0,0,1),(0,0,0),90)
-            )
+            ])
             .translate((
                 0,#s,
                 0,#-1*(self.width/2-self.wall_width/2),
@@ -149,13 +156,12 @@ class Catwalk(Base):
         x_translate = self.length/2-self.wall_width/2
         y_translate = -1*(self.width/2-self.wall_width/2)
 
-        corners = (
-            cq.Workplane("XY")
-            .union(corner).translate((x_translate,y_translate,0))
-            .union(corner.rotate((0,0,1),(0,0,0), 90).translate((-1*x_translate,y_translate,0)))
-            .union(corner.rotate((0,0,1),(0,0,0), 180).translate((-1*x_translate,-1*y_translate,0)))
-            .union(corner.rotate((0,0,1),(0,0,0), -90).translate((x_translate,-1*y_translate,0)))
-        )
+        corners = fuse_shapes([
+            corner.translate((x_translate,y_translate,0)),
+            corner.rotate((0,0,1),(0,0,0), 90).translate((-1*x_translate,y_translate,0)),
+            corner.rotate((0,0,1),(0,0,0), 180).translate((-1*x_translate,-1*y_translate,0)),
+            corner.rotate((0,0,1),(0,0,0), -90).translate((x_translate,-1*y_translate,0))
+        ])
         self.corner_walls = corners
         #self.corner_walls = arch_cut
 
@@ -169,76 +175,140 @@ class Catwalk(Base):
         rows = math.floor((self.length-self.height) / (self.floor_tile_size+self.floor_tile_padding))
         colums = math.floor((self.width-self.height) / ((self.floor_tile_size+self.floor_tile_padding)/2))
 
-        diamonds = grid.make_grid(
-            diamond,
-            [self.floor_tile_size+self.floor_tile_padding, (self.floor_tile_size+self.floor_tile_padding)/2],
+        tile_space = self.floor_tile_size+self.floor_tile_padding
+        locations = grid_locations(
+            [tile_space, tile_space/2],
             rows = rows+2,
             columns = colums,
-            odd_col_push = [(self.floor_tile_size+self.floor_tile_padding)/2,0]
-        )
-
-        outline = (
-            cq.Workplane("XY")
-            .box(
-                self.length-self.height,
-                self.width-self.height,
-                self.height/2
-            )
-            .translate((0,0,self.height/2))
+            odd_col_push = [tile_space/2,0],
+            translate = (0, 0, self.floor_height/2+self.height/2-1)
         )
 
+        outline_length = self.length-self.height
+        outline_width = self.width-self.height
         walkway_length = self.interior_length + self.fit_padding
         walkway_width = self.interior_width + self.fit_padding
-        walkway_cut = (
-            cq.Workplane("XY")
-            .box(
-                walkway_length,
-                walkway_width,
-                self.height/2
+        ring_z = self.height/2-1
+
+        # only the diamonds crossing the walkway's edges need the intersect
+        outline = box_bounds(outline_length, outline_width, self.height/2, (0,0,ring_z))
+        walkway_cut = box_bounds(walkway_length, walkway_width, self.height/2, (0,0,ring_z))
+        diamond_bounds = diamond.val().BoundingBox()
+
+        inside = []
+        boundary = []
+        for location in locations:
+            placement = classify_in_ring(moved_bounds(diamond_bounds, location), outline, walkway_cut)
+            if placement == "inside":
+                inside.append(location)
+            elif placement == "boundary":
+                boundary.append(location)
+
+        floor_tiles = instances(diamond, inside)
+
+        if boundary:
+            walway = (
+                cq.Workplane("XY")
+                .box(outline_length, outline_width, self.height/2)
+                .cut(
+                    cq.Workplane("XY")
+                    .box(walkway_length, walkway_width, self.height/2)
+                )
+                .translate((0,0,ring_z))
             )
-            .translate((0,0,self.height/2))
-        )
+            edge_tiles = cq.Workplane("XY").add(cq.Compound.makeCompound(instances(diamond, boundary)))
+            floor_tiles.extend(walway.intersect(edge_tiles).solids().vals())
 
-        walway = outline.cut(walkway_cut)
-        floor_tiles = diamonds.translate((
-            0,
-            0,
-            self.floor_height/2+self.height/2
-        ))
-
-        self.floor_tiles = walway.intersect(floor_tiles).translate((0,0,-1))
+        self.floor_tiles = None
+        if floor_tiles:
+            self.floor_tiles = cq.Workplane("XY").add(cq.Compound.makeCompound(floor_tiles))
 
         #self.floor_tiles = floor_tiles
 
 
     def make(self):
         super().make()
-        self.__make_platform()
+
+        with instrument("Catwalk.platform") as record:
+            self.__make_platform()
+            record.outputs(self.platform)
 
         if self.render_magnets:
-            self.__make_magnet_cuts()
+            with instrument("Catwalk.magnet_cuts") as record:
+                self.__make_magnet_cuts()
+                record.outputs(self.cut_magnets)
 
         if self.render_corner_walls:
-            self.__make_corner_walls()
+            with instrument("Catwalk.corner_walls") as record:
+                self.__make_corner_walls()
+                record.outputs(self.corner_walls)
 
         if self.render_floor:
-            self.__make_floor_tiles()
+            with instrument("Catwalk.floor_tiles") as record:
+                self.__make_floor_tiles()
+                record.outputs(self.floor_tiles)
 
-    def build(self):
-        super().build()
-        scene = (
-            cq.Workplane("XY")
-            .union(self.platform)
-        )
+    def build_operations(self):
+        '''
+        The steps of build as (operation, shapes), used by export_stl_fast.
+        '''
+        operations = [("union", [self.platform])]
 
         if self.render_magnets and self.cut_magnets:
-            scene = scene.cut(self.cut_magnets)
+            operations.append(("cut", [self.cut_magnets]))
 
         if self.render_corner_walls and self.corner_walls:
-            scene = scene.union(self.corner_walls)
+            operations.append(("union", [self.corner_walls]))
 
         if self.render_floor and self.floor_tiles:
-            scene = scene.cut(self.floor_tiles)
+            operations.append(("cut", [self.floor_tiles]))
+
+        return operations
+
+    def export_stl_fast(self, path, tolerance=0.1, angular_tolerance=0.1, profile=None):
+        '''
+        Writes the built catwalk to path as binary STL,
+        corner walls no cut reaches are meshed without being fused.
+        '''
+        with instrument("Catwalk.export_stl_fast"):
+            return fast_export_stl([(self.build_operations(), (0, 0, 0), "catwalk")], path, tolerance, angular_tolerance, profile)
+
+    def export_3mf(self, path, tolerance=0.1, angular_tolerance=0.1, profile=None):
+        '''
+        Writes the built catwalk to path as 3MF, each distinct mesh stored once.
+        '''
+        with instrument("Catwalk.export_3mf"):
+            return export_3mf([(self.build_operations(), (0, 0, 0), "catwalk")], path, tolerance, angular_tolerance, profile)
+
+    def export_glb(self, path, tolerance=0.1, angular_tolerance=0.1, profile=None):
+        '''
+        Writes the built catwalk to path as GLB for previews,
+        the corner walls no cut reaches are grouped as walls.
+        '''
+        with instrument("Catwalk.export_glb"):
+            walls = self.render_corner_walls and self.corner_walls
+            parts = component_parts((self.build_operations(), (0, 0, 0), "catwalk"), [("walls", walls)])
+            return export_glb(parts, path, tolerance, angular_tolerance, profile)
+
+    def build(self):
+        super().build()
+
+        with instrument("Catwalk.build") as record:
+            scene = (
+                cq.Workplane("XY")
+                .union(self.platform)
+            )
+
+            if self.render_magnets and self.cut_magnets:
+                scene = scene.cut(self.cut_magnets)
+
+            if self.render_corner_walls and self.corner_walls:
+                scene = scene.union(self.corner_walls)
+
+            if self.render_floor and self.floor_tiles:
+                scene = scene.cut(self.floor_tiles)
+
+            record.outputs(scene)
 
         return scene
 
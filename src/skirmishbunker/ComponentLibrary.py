@@ -0,0 +1,74 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import json
+import threading
+from collections import OrderedDict
+from .StageCache import canonical
+
+class ComponentLibrary:
+    '''
+    In memory cache of built components (doors, hatches, arch panels, tiles)
+    keyed by the component name and the parameters used to build it.
+    Holds at most max_size components, least recently used are dropped first.
+    '''
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self.components = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, name, params, make):
+        '''
+        Return the component for name and params, calling make() to build it on a miss.
+        A new Workplane is returned every time so callers can't alter the cached shapes.
+        '''
+        key = (name, json.dumps(canonical(params), sort_keys=True))
+
+        with self.lock:
+            if key in self.components:
+                self.components.move_to_end(key)
+                self.hits += 1
+                return cq.Workplane("XY").add(self.components[key])
+            self.misses += 1
+
+        vals = make().vals()
+
+        with self.lock:
+            self.components[key] = vals
+            self.components.move_to_end(key)
+            while len(self.components) > self.max_size:
+                self.components.popitem(last=False)
+
+        return cq.Workplane("XY").add(vals)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.components),
+            "max_size": self.max_size
+        }
+
+    def clear(self):
+        with self.lock:
+            self.components.clear()
+            self.hits = 0
+            self.misses = 0
+
+# shared by every generator in the process
+component_library = ComponentLibrary()
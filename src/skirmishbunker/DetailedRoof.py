@@ -14,9 +14,14 @@
 
 import cadquery as cq
 from .FlatRoof import FlatRoof
-from cadqueryhelper import series, grid
+from .roofTiles import slotted_tile
+from .instancedGrid import make_instanced_grid
+from .fuseShapes import fuse_shapes
+from cadqueryhelper import series
 from cqterrain import roof
 from math import floor as math_floor
+from .Instrumentation import instrument
+from .faceMerge import merge_faces
 
 class DetailedRoof(FlatRoof):
     def __init__(self):
@@ -140,13 +145,12 @@ class DetailedRoof(FlatRoof):
             .translate((x_translate,0,1))
         )
 
-        self.cut_walls = (
-            cq.Workplane("XY")
-            .union(x_wall_cut)
-            .union(x_wall_cut.rotate((0,0,1),(0,0,0),180))
-            .union(y_wall_cut)
-            .union(y_wall_cut.rotate((0,0,1),(0,0,0),180))
-        )
+        self.cut_walls = fuse_shapes([
+            x_wall_cut,
+            x_wall_cut.rotate((0,0,1),(0,0,0),180),
+            y_wall_cut,
+            y_wall_cut.rotate((0,0,1),(0,0,0),180)
+        ])
 
 
     def __make_wall_details(self):
@@ -183,13 +187,12 @@ class DetailedRoof(FlatRoof):
             .union(x_series)
             .translate((0,y_translate,0)))
 
-        self.wall_details = (
-            cq.Workplane("XY")
-            .union(x_plus)
-            .union(x_plus.rotate((0,0,1),(0,0,0),180))
-            .union(y_plus)
-            .union(y_plus.rotate((0,0,1),(0,0,0),180))
-        )
+        self.wall_details = fuse_shapes([
+            x_plus,
+            x_plus.rotate((0,0,1),(0,0,0),180),
+            y_plus,
+            y_plus.rotate((0,0,1),(0,0,0),180)
+        ])
 
 
     #@todo discussion point - this is a hack until I can figure out why the FlatRoof tile generator created different results.
@@ -201,42 +204,73 @@ class DetailedRoof(FlatRoof):
         int_length = self.length-(2*(self.inset+self.wall_width))
         int_width = self.width-(2*(self.inset+self.wall_width))
 
-        tile = cq.Workplane("XY").box(tile_size, tile_size, tile_height)
-        slot = cq.Workplane("XY").slot2D(tile_size,2).extrude(tile_height).rotate((0,0,1),(0,0,0),45)
-        slot2 = cq.Workplane("XY").slot2D(tile_size-7,2).extrude(tile_height).rotate((0,0,1),(0,0,0),45).translate((-3,-3,0))
-        slot3 = cq.Workplane("XY").slot2D(tile_size-7,2).extrude(tile_height).rotate((0,0,1),(0,0,0),45).translate((3,3,0))
-        slot4 = cq.Workplane("XY").slot2D(tile_size-7-7,2).extrude(tile_height).rotate((0,0,1),(0,0,0),45).translate((-3-3,-3-3,0))
-        slot5 = cq.Workplane("XY").slot2D(tile_size-7-7,2).extrude(tile_height).rotate((0,0,1),(0,0,0),45).translate((3+3,3+3,0))
-
-        tile = tile.cut(slot).cut(slot2).cut(slot3).cut(slot4).cut(slot5)
+        # the slots only cut the top half of the tile
+        slots = [
+            (tile_size, 2, 0),
+            (tile_size - 7, 2, -3),
+            (tile_size - 7, 2, 3),
+            (tile_size - 7 - 7, 2, -3 - 3),
+            (tile_size - 7 - 7, 2, 3 + 3)
+        ]
+        tile = slotted_tile(tile_size, tile_height, slots, slot_depth = tile_height / 2)
 
         columns = math_floor(int_width/(tile_size + tile_padding))
         rows = math_floor(int_length/(tile_size + tile_padding))
-        tile_grid = grid.make_grid(part=tile, dim = [tile_size + tile_padding, tile_size + tile_padding], columns = columns, rows = rows)
-
-        self.tiles = tile_grid.translate((0,0,self._calc_tile_z_translate()))
+        self.tiles = make_instanced_grid(
+            part = tile,
+            dim = [tile_size + tile_padding, tile_size + tile_padding],
+            columns = columns,
+            rows = rows,
+            translate = (0, 0, self._calc_tile_z_translate())
+        )
 
 
     def make(self):
         super().make()
 
         self.angle = roof.angle(self.inset, self.height)
-        self.__make_wall_cuts()
-        self.__make_wall_details()
 
+        with instrument("DetailedRoof.wall_cuts") as record:
+            self.__make_wall_cuts()
+            record.outputs(self.cut_walls)
 
-    def build(self):
-        result = super().build()
+        with instrument("DetailedRoof.wall_details") as record:
+            self.__make_wall_details()
+            record.outputs(self.wall_details)
 
-        result = (
-            cq.Workplane("XY")
-            .union(result)
-            .cut(self.cut_walls)
-            .union(self.wall_details)
-        )
 
-        # Re-cut holes as they will have been filled
+    def build_operations(self):
+        operations = super().build_operations()
+        operations.append(("cut", [self.cut_walls]))
+        operations.append(("union", [self.wall_details]))
+
         if self.cut_holes and self.holes:
-            result = result.cut(self.holes)
+            operations.append(("cut", [self.holes]))
+
+        return operations
+
+    def preview_components(self):
+        return super().preview_components() + [("walls", self.wall_details)]
+
+    def build(self):
+        with instrument("DetailedRoof.build") as record:
+            result = super().build()
+
+            clean = not self.merge_faces
+            result = (
+                cq.Workplane("XY")
+                .union(result, clean=clean)
+                .cut(self.cut_walls, clean=clean)
+                .union(self.wall_details, clean=clean)
+            )
+
+            if self.merge_faces:
+                result = merge_faces(result, "walls", self.merge_stats)
+
+            # Re-cut holes as they will have been filled
+            if self.cut_holes and self.holes:
+                result = result.cut(self.holes)
+
+            record.outputs(result)
 
         return result
@@ -13,12 +13,25 @@
 # limitations under the License.
 
 import cadquery as cq
+import numpy as np
 from .Hatch import Hatch
 from .SeriesHelper import SeriesHelper
-from cadqueryhelper import Base, series, grid
+from .ComponentLibrary import component_library
+from .roofTiles import slotted_tile
+from .instancedGrid import make_instanced_grid
+from .tileCulling import cull_tiles
+from .fastExport import fast_export_stl, component_parts
+from .export3mf import export_3mf
+from .exportGlb import export_glb
+from .pointPattern import corner_points, make_cylinders
+from .TrackedParams import TrackedParams
+from .Instrumentation import instrument
+from .faceMerge import merge_faces
+from .fuseShapes import fuse_touching
+from cadqueryhelper import Base, series
 from math import floor as math_floor
 
-class FlatRoof(Base):
+class FlatRoof(TrackedParams, Base):
     def __init__(self):
         super().__init__()
 
@@ -49,6 +62,14 @@ class FlatRoof(Base):
         # less then -1 results in a cut
         self.tile_z_offset = -1
 
+        # leave out the tiles the hatch cuts would remove entirely
+        self.cull_covered_tiles = False
+        self.tile_cull_stats = None
+
+        # skip the clean after each boolean, merge same domain faces once per stage instead
+        self.merge_faces = False
+        self.merge_stats = None
+
         # Hatches
         self.render_hatches = False
         self.render_hatch_cuts = False
@@ -67,6 +88,8 @@ class FlatRoof(Base):
         self.hole_depth = 1
         #@todo discussion point - I would prefer if this radius.
         self.hole_radius = 1
+        # (x, y) hole centers, set by a Bunker so the holes line up with its pips
+        self.hole_pattern = None
 
         #shapes
         self.roof_body = None
@@ -75,6 +98,8 @@ class FlatRoof(Base):
         self.cut_hatches = None
         self.holes = None
 
+        self.clear_changed()
+
     def __should_cut_tiles(self):
         if self.tile_z_offset < -1:
             return True
@@ -202,69 +227,37 @@ class FlatRoof(Base):
 
         self.roof_body = roof_body
 
-    def _make_tiles(self):
-        length = self._calc_tile_space_length()
-        width = self._calc_tile_space_width()
-        tile_space = self._calc_tile_spacing()
+    def _tile_slots(self):
         slot_translate = self._calc_slot_translation()
         slot_radius = self._calc_slot_radius()
         slot_length_md = self._calc_slot_length_md()
         slot_length_sm = self._calc_slot_length_sm()
 
-        tile = cq.Workplane("XY").box(
-            self.tile_size,
-            self.tile_size,
-            self.tile_height
-        )
+        return [
+            (self.tile_size, slot_radius, 0),
+            (slot_length_md, slot_radius, 0 - slot_translate),
+            (slot_length_md, slot_radius, slot_translate),
+            (slot_length_sm, slot_radius, 0 - (slot_translate * 2)),
+            (slot_length_sm, slot_radius, slot_translate * 2)
+        ]
 
-        slot = (cq.Workplane("XY")
-            .slot2D(self.tile_size, slot_radius)
-            .extrude(self.tile_height * 2)
-            .rotate((0, 0, 1), (0, 0, 0), 45)
-            .translate((0, 0, 0 - (self.tile_height / 2))))
-
-        slot2 = (cq.Workplane("XY")
-            .slot2D(slot_length_md, slot_radius)
-            .extrude(self.tile_height * 2)
-            .rotate((0, 0, 1), (0, 0, 0), 45)
-            .translate((0 - slot_translate, 0 - slot_translate, 0 - (self.tile_height / 2))))
-
-        slot3 = (cq.Workplane("XY")
-            .slot2D(slot_length_md, slot_radius)
-            .extrude(self.tile_height * 2)
-            .rotate((0, 0, 1), (0, 0, 0), 45)
-            .translate((slot_translate, slot_translate, 0 - (self.tile_height / 2))))
-
-        slot4 = (cq.Workplane("XY")
-            .slot2D(slot_length_sm, slot_radius)
-            .extrude(self.tile_height * 2)
-            .rotate((0, 0, 1), (0, 0, 0), 45)
-            .translate((0 - (slot_translate *2), 0 - (slot_translate * 2), 0 - (self.tile_height / 2))))
-
-        slot5 = (cq.Workplane("XY")
-            .slot2D(slot_length_sm, slot_radius)
-            .extrude(self.tile_height * 2)
-            .rotate((0, 0, 1), (0, 0, 0), 45)
-            .translate((slot_translate * 2, slot_translate * 2, 0 - (self.tile_height / 2))))
-
-        tile = (tile
-                .cut(slot)
-                .cut(slot2)
-                .cut(slot3)
-                .cut(slot4)
-                .cut(slot5))
+    def _make_tiles(self):
+        length = self._calc_tile_space_length()
+        width = self._calc_tile_space_width()
+        tile_space = self._calc_tile_spacing()
+
+        tile = slotted_tile(self.tile_size, self.tile_height, self._tile_slots())
 
         columns = math_floor(width / (tile_space))
         rows = math_floor(length / (tile_space))
-        tile_grid = grid.make_grid(
+        self.tiles = make_instanced_grid(
             part = tile,
             dim = [tile_space, tile_space],
             columns = columns,
-            rows = rows
+            rows = rows,
+            translate = (0, 0, self._calc_tile_z_translate())
         )
 
-        self.tiles = tile_grid.translate((0, 0, self._calc_tile_z_translate()))
-
     def __make_cut_hatches(self):
         int_length = self._calc_hatch_space_length()
         int_width = self._calc_hatch_space_width()
@@ -314,6 +307,15 @@ class FlatRoof(Base):
 
         self.cut_hatches = series.get_scene()
 
+    def __make_hatch(self):
+        bp = Hatch()
+        bp.length = self.hatch_length
+        bp.width = self.hatch_width
+        bp.height = self.hatch_height
+        bp.hatch_radius = self.hatch_radius
+        bp.make()
+        return bp.build()
+
     def __make_hatches(self):
         int_length = self._calc_hatch_space_length()
         length_offset = self._calc_hatch_length_offset()
@@ -326,14 +328,16 @@ class FlatRoof(Base):
             int_length = self.bunker_int_length
             int_width = self.bunker_int_width
 
-        bp = Hatch()
-        bp.length = self.hatch_length
-        bp.width = self.hatch_width
-        bp.height = self.hatch_height
-        bp.hatch_radius = self.hatch_radius
-        bp.make()
-
-        hatch = bp.build()
+        hatch = component_library.get(
+            "Hatch",
+            {
+                "length": self.hatch_length,
+                "width": self.hatch_width,
+                "height": self.hatch_height,
+                "hatch_radius": self.hatch_radius
+            },
+            self.__make_hatch
+        )
 
         series = SeriesHelper()
         series.shape = hatch
@@ -342,77 +346,174 @@ class FlatRoof(Base):
         series.length_offset = length_offset
         series.comp_length = self.panel_length
         series.comp_padding = self.panel_padding
-        series.x_translate = (int_length / 2) - (bp.width / 2)
-        series.y_translate = (int_width / 2) - (bp.width / 2)
+        series.x_translate = (int_length / 2) - (self.hatch_width / 2)
+        series.y_translate = (int_width / 2) - (self.hatch_width / 2)
         series.z_translate = z_translate
         series.keep_list = self.hatch_panels
         series.make()
 
         self.hatches = series.get_scene()
 
-    def make_hole_cuts(self):
-        x_translate = self._calc_hole_x_translate()
-        y_translate = self._calc_hole_y_translate()
-        z_translate = self._calc_hole_z_translate()
+    def hole_points(self):
+        if self.hole_pattern is not None:
+            return np.asarray(self.hole_pattern, dtype=np.float64)
 
-        # fun quirk cylinder method signature is height then radius
-        hole = cq.Workplane("XY").cylinder(
-            self.hole_depth,
-            self.hole_radius
+        return corner_points(
+            2 * self._calc_hole_x_translate(),
+            2 * self._calc_hole_y_translate()
         )
 
-        holes = (
-            cq.Workplane("XY")
-            .union(hole.translate((x_translate, y_translate, z_translate)))
-            .union(hole.translate((-1 * x_translate, y_translate, z_translate)))
-            .union(hole.translate((-1 * x_translate, -1 * y_translate, z_translate)))
-            .union(hole.translate((x_translate, -1 * y_translate, z_translate)))
+    def make_hole_cuts(self):
+        # fun quirk cylinder method signature is height then radius
+        self.holes = make_cylinders(
+            self.hole_points(),
+            self.hole_depth,
+            self.hole_radius,
+            self._calc_hole_z_translate()
         )
 
-        self.holes = holes
-
     def make(self):
         super().make()
 
-        self._make_roof_body()
+        with instrument("FlatRoof.roof_body") as record:
+            self._make_roof_body()
+            record.outputs(self.roof_body)
 
         if self.render_tiles:
-            self._make_tiles()
+            with instrument("FlatRoof.tiles") as record:
+                self._make_tiles()
+                record.outputs(self.tiles)
 
         if self.render_hatches:
-            self.__make_hatches()
+            with instrument("FlatRoof.hatches") as record:
+                self.__make_hatches()
+                record.outputs(self.hatches)
 
         if self.render_hatch_cuts:
-            self.__make_cut_hatches()
+            with instrument("FlatRoof.cut_hatches") as record:
+                self.__make_cut_hatches()
+                record.outputs(self.cut_hatches)
 
         if self.cut_holes:
-            self.make_hole_cuts()
+            with instrument("FlatRoof.holes") as record:
+                self.make_hole_cuts()
+                record.outputs(self.holes)
 
-    def build(self):
-        super().build()
+    def _tiles_culled(self):
+        return bool(self.render_tiles and self.tiles and self.cull_covered_tiles and self.render_hatch_cuts and self.cut_hatches)
 
-        tiles = self.render_tiles
-        cut_tiles = self.__should_cut_tiles()
+    def _tiles_precut(self):
+        '''
+        True when _build_tiles already has the hatch cuts applied and goes in after them.
+        Tiles cut into the roof are only culled, cutting them first would change the result.
+        '''
+        return self._tiles_culled() and not self.__should_cut_tiles()
 
-        result = (
-            cq.Workplane("XY")
-            .union(self.roof_body)
-        )
+    def _build_tiles(self):
+        tiles = self.tiles
+        self.tile_cull_stats = None
+
+        if self._tiles_culled():
+            tiles, self.tile_cull_stats = cull_tiles(tiles, self.cut_hatches, self._tiles_precut())
+
+        return tiles
+
+    def build_operations(self):
+        '''
+        The steps of build as (operation, shapes), used by export_stl_fast.
+        '''
+        operations = [("union", [self.roof_body])]
 
-        if tiles and self.tiles and cut_tiles == True:
-            result = result.cut(self.tiles)
-        elif tiles and self.tiles:
-            result = result.union(self.tiles)
+        tiles = self._build_tiles()
+        if self.render_tiles and tiles and not self._tiles_precut():
+            operations.append(("cut" if self.__should_cut_tiles() else "union", [tiles]))
 
         if self.render_hatch_cuts and self.cut_hatches:
-            result = result.cut(self.cut_hatches)
+            operations.append(("cut", [self.cut_hatches]))
+
+        if self.render_tiles and tiles and self._tiles_precut():
+            operations.append(("union", [tiles]))
 
         if self.render_hatches and self.hatches:
-            result = result.add(self.hatches)
+            operations.append(("add", [self.hatches]))
 
         if self.cut_holes and self.holes:
-            result = result.cut(self.holes)
+            operations.append(("cut", [self.holes]))
+
+        return operations
+
+    def export_stl_fast(self, path, tolerance=0.1, angular_tolerance=0.1, profile=None):
+        '''
+        Writes the built roof to path as binary STL,
+        the tiles and hatches no cut reaches are meshed once and copied.
+        '''
+        with instrument("FlatRoof.export_stl_fast"):
+            return fast_export_stl([(self.build_operations(), (0, 0, 0), "roof")], path, tolerance, angular_tolerance, profile)
+
+    def export_3mf(self, path, tolerance=0.1, angular_tolerance=0.1, profile=None):
+        '''
+        Writes the built roof to path as 3MF, each distinct mesh stored once.
+        '''
+        with instrument("FlatRoof.export_3mf"):
+            return export_3mf([(self.build_operations(), (0, 0, 0), "roof")], path, tolerance, angular_tolerance, profile)
+
+    def preview_components(self):
+        '''
+        (name, shape) of the decorations export_glb groups on their own.
+        '''
+        return [
+            ("tiles", self.render_tiles and self.tiles),
+            ("hatches", self.render_hatches and self.hatches)
+        ]
+
+    def export_glb(self, path, tolerance=0.1, angular_tolerance=0.1, profile=None):
+        '''
+        Writes the built roof to path as GLB for previews, each distinct mesh stored once
+        and placed by instanced nodes grouped as roof, tiles and hatches.
+        '''
+        with instrument("FlatRoof.export_glb"):
+            parts = component_parts((self.build_operations(), (0, 0, 0), "roof"), self.preview_components())
+            return export_glb(parts, path, tolerance, angular_tolerance, profile)
+
+    def build(self):
+        super().build()
+
+        with instrument("FlatRoof.build") as record:
+            tiles = self.render_tiles
+            cut_tiles = self.__should_cut_tiles()
+            clean = not self.merge_faces
+            self.merge_stats = [] if self.merge_faces else None
+
+            result = (
+                cq.Workplane("XY")
+                .union(self.roof_body, clean=clean)
+            )
+
+            tile_shapes = self._build_tiles()
+            precut = self._tiles_precut()
+
+            if tiles and tile_shapes and cut_tiles == True:
+                result = result.cut(tile_shapes, clean=clean)
+            elif tiles and tile_shapes and not precut:
+                result = fuse_touching(result, tile_shapes, clean=clean)
+
+            if self.render_hatch_cuts and self.cut_hatches:
+                result = result.cut(self.cut_hatches, clean=clean)
+
+            if tiles and tile_shapes and precut:
+                result = fuse_touching(result, tile_shapes, clean=clean)
+
+            if self.merge_faces:
+                result = merge_faces(result, "roof", self.merge_stats)
+
+            if self.render_hatches and self.hatches:
+                result = result.add(self.hatches)
+
+            if self.cut_holes and self.holes:
+                result = result.cut(self.holes)
+
+            #return self.cut_hatches.union(self.tiles).add(self.hatches)
+            #return self.holes
+            record.outputs(result)
 
-        #return self.cut_hatches.union(self.tiles).add(self.hatches)
-        #return self.holes
         return result
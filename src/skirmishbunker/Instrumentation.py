@@ -0,0 +1,225 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import os
+import threading
+import time
+
+# the Instrumentation currently collecting, None when disabled
+_active = None
+_local = threading.local()
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+def _reset_after_fork():
+    # a forked worker starts with its own, empty, instrumentation state
+    global _active, _local
+    if _active is not None:
+        cq.Shape._bool_op = _active.original_bool_op
+        _active = None
+    _local = threading.local()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def count_shapes(shapes):
+    faces = 0
+    solids = 0
+    for shape in shapes:
+        if shape is None:
+            continue
+        vals = shape.vals() if isinstance(shape, cq.Workplane) else [shape]
+        for val in vals:
+            if isinstance(val, cq.Shape):
+                faces += len(val.Faces())
+                solids += len(val.Solids())
+    return faces, solids
+
+class NullRecord:
+    '''
+    Handed out when instrumentation is disabled, does nothing.
+    '''
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def outputs(self, *shapes):
+        pass
+
+NULL_RECORD = NullRecord()
+
+class StageRecord:
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.shapes = ()
+        self.booleans = 0
+
+    def outputs(self, *shapes):
+        '''
+        Shapes produced by the stage, their faces and solids are counted on exit.
+        '''
+        self.shapes = shapes
+
+    def __enter__(self):
+        stack = _stack()
+        self.depth = len(stack)
+        stack.append(self)
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_time = time.perf_counter() - self.wall_start
+        cpu_time = time.process_time() - self.cpu_start
+        _stack().remove(self)
+
+        faces, solids = count_shapes(self.shapes)
+        self.instrumentation.add({
+            "name": self.name,
+            "depth": self.depth,
+            "wall_time": wall_time,
+            "cpu_time": cpu_time,
+            "booleans": self.booleans,
+            "faces": faces,
+            "solids": solids,
+            "error": exc_type.__name__ if exc_type else None
+        })
+        return False
+
+def instrument(name):
+    '''
+    Context manager timing one stage, cheap no-op unless an Instrumentation is active.
+    '''
+    if _active is None:
+        return NULL_RECORD
+    return StageRecord(_active, name)
+
+def stack_snapshot():
+    '''
+    The records open on this thread, hand to run_with_stack in a worker thread
+    so its stages nest under them.
+    '''
+    if _active is None:
+        return None
+    return list(_stack())
+
+def run_with_stack(snapshot, function, *args):
+    if snapshot is None:
+        return function(*args)
+
+    _local.stack = list(snapshot)
+    try:
+        return function(*args)
+    finally:
+        _local.stack = []
+
+def merge_records(records, wall_time):
+    '''
+    Add the records collected in a worker process under the records open on this thread.
+    '''
+    if _active is None:
+        return
+
+    stack = _stack()
+    top = [record for record in records if record["depth"] == 0]
+    booleans = sum(record["booleans"] for record in top)
+    for record in stack:
+        record.booleans += booleans
+
+    for record in records:
+        record = dict(record)
+        record["depth"] += len(stack)
+        record["process_wall_time"] = wall_time
+        _active.add(record)
+
+class Instrumentation:
+    '''
+    Collects per stage wall time, cpu time, boolean counts and output face/solid counts
+    for every make and build run while it is active.
+
+    cpu_time is process cpu time, so it includes OCC's own worker threads, and under the
+    thread stage executor also any stage running at the same time.
+    A stage's booleans are the calls made on the thread running it, or a thread started
+    through run_with_stack. process_booleans in the totals counts every call in the process.
+
+        with Instrumentation(callback=print) as stats:
+            bp.make()
+            bp.build()
+        json.dumps(stats.summary())
+    '''
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.records = []
+        self.lock = threading.Lock()
+        self.original_bool_op = None
+        self.process_booleans = 0
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+
+        if self.callback:
+            self.callback(record)
+
+    def __count_boolean(self):
+        with self.lock:
+            self.process_booleans += 1
+            for record in _stack():
+                record.booleans += 1
+
+    def __enter__(self):
+        global _active
+        if _active is not None:
+            raise Exception("Instrumentation is already active")
+
+        # every Shape cut, fuse and intersect goes through _bool_op
+        original = cq.Shape._bool_op
+        count = self.__count_boolean
+
+        def bool_op(*args, **kwargs):
+            count()
+            return original(*args, **kwargs)
+
+        self.original_bool_op = original
+        cq.Shape._bool_op = bool_op
+        _active = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _active
+        cq.Shape._bool_op = self.original_bool_op
+        _active = None
+        return False
+
+    def summary(self):
+        '''
+        Plain dict, safe to dump as json.
+        '''
+        top = [record for record in self.records if record["depth"] == 0]
+        return {
+            "stages": list(self.records),
+            "totals": {
+                "wall_time": sum(record["wall_time"] for record in top),
+                "cpu_time": sum(record["cpu_time"] for record in top),
+                "booleans": sum(record["booleans"] for record in top),
+                "process_booleans": self.process_booleans
+            }
+        }
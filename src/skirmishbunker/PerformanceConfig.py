@@ -0,0 +1,87 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from OCP.BOPAlgo import BOPAlgo_GlueEnum
+from OCP.OSD import OSD_Parallel, OSD_ThreadPool
+
+DEFAULTS = {
+    "parallel_boolean": True,
+    "parallel_mesh": True,
+    "threads": None,
+    "fuzzy_value": None,
+    "glue": "off"
+}
+
+GLUE_MODES = {
+    "off": BOPAlgo_GlueEnum.BOPAlgo_GlueOff,
+    "shift": BOPAlgo_GlueEnum.BOPAlgo_GlueShift,
+    "full": BOPAlgo_GlueEnum.BOPAlgo_GlueFull
+}
+
+class PerformanceConfig:
+    '''
+    OCC options for the package's meshing and its fuses of touching shapes.
+
+        performance_config.configure(threads=4, fuzzy_value=1e-5, glue="shift")
+
+    parallel_boolean / parallel_mesh switch OCC's internal threading for those fuses and meshing.
+    threads sizes OCC's thread pool, None leaves one thread per logical cpu.
+    fuzzy_value is the fuzzy tolerance of the touching fuses, None for exact booleans.
+    glue "shift" or "full" speeds up fusing shapes that only touch, like gridded tiles.
+    Only fuse_touching applies fuzzy_value and glue, cuts and other unions stay exact.
+    '''
+    def __init__(self):
+        for key, value in DEFAULTS.items():
+            setattr(self, key, value)
+
+    def settings(self):
+        return {key: getattr(self, key) for key in DEFAULTS}
+
+    def configure(self, **settings):
+        for key in settings:
+            if key not in DEFAULTS:
+                raise Exception(f"Unknown performance setting {key}")
+
+        if settings.get("glue", self.glue) not in GLUE_MODES:
+            raise Exception(f"Unrecognized glue mode {settings.get('glue')}")
+
+        for key, value in settings.items():
+            setattr(self, key, value)
+
+        threads = self.threads or OSD_Parallel.NbLogicalProcessors_s()
+        pool = OSD_ThreadPool.DefaultPool_s()
+        if pool.NbThreads() != threads:
+            pool.Init(threads)
+        pool.SetNbDefaultThreadsToLaunch(threads)
+
+    def reset(self):
+        self.configure(**DEFAULTS)
+
+    def apply(self, op):
+        '''
+        Sets the fuzzy and glue options on an OCC boolean before it is built.
+        '''
+        if self.fuzzy_value and hasattr(op, "SetFuzzyValue"):
+            op.SetFuzzyValue(self.fuzzy_value)
+        if self.glue != "off" and hasattr(op, "SetGlue"):
+            op.SetGlue(GLUE_MODES[self.glue])
+
+# shared by every generator in the process
+performance_config = PerformanceConfig()
+
+def configure_worker(settings):
+    '''
+    Executor initializer, gives a worker process the parent's settings.
+    '''
+    performance_config.configure(**settings)
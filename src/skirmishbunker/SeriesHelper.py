@@ -13,8 +13,38 @@
 # limitations under the License.
 
 import cadquery as cq
-from cadqueryhelper import series
-from math import floor
+import numpy as np
+from OCP.gp import gp_Trsf
+from math import floor, radians, cos, sin
+
+PLACEMENT_DTYPE = np.dtype([
+    ("index", np.int32),
+    ("wall", "U7"),
+    ("panel", np.int32),
+    ("solid", np.int32),
+    ("matrix", np.float64, (4, 4))
+])
+
+def placement_matrix(offset, rotation, translation):
+    '''
+    Matrix for a copy moved offset along x, rotated like
+    rotate((0,0,1), (0,0,0), rotation) and then translated.
+    '''
+    # the rotation axis points down -Z
+    angle = radians(-1 * rotation)
+    matrix = np.array([
+        [cos(angle), -1 * sin(angle), 0, 0],
+        [sin(angle), cos(angle), 0, 0],
+        [0, 0, 1, 0],
+        [0, 0, 0, 1]
+    ])
+    matrix[:3, 3] = matrix[:3, :3] @ np.array([offset, 0, 0]) + np.array(translation)
+    return matrix
+
+def matrix_to_trsf(matrix):
+    trsf = gp_Trsf()
+    trsf.SetValues(*matrix[:3].flatten().tolist())
+    return trsf
 
 class SeriesHelper:
     def __init__(self):
@@ -36,6 +66,7 @@ class SeriesHelper:
         self.skip_list = []
         self.keep_list = []
 
+        self.placements = None
         self.scene = None
 
     def __validate(self):
@@ -54,14 +85,23 @@ class SeriesHelper:
 
         return self.scene
 
-    def make(self):
+    def __series_offsets(self, size):
+        # matches cadqueryhelper.series, copies are spaced by the shape
+        # length plus length_offset and centered on the origin
+        shape_length = self.shape.val().BoundingBox().xlen
+        step = shape_length + self.length_offset
+        return [(i * step) - ((size - 1) * step) / 2 for i in range(size)]
+
+    def make_placements(self):
+        '''
+        Build the placement table without making any geometry.
+        One row per solid copy, in the index order skip_list and keep_list refer to.
+        '''
         self.__validate()
 
-        shape = self.shape
         length = self.outer_length
         width = self.outer_width
         length2 = self.comp_length
-        length_offset = self.length_offset
         padding = self.comp_padding
         x_trans = self.x_translate
         y_trans = self.y_translate
@@ -70,55 +110,47 @@ class SeriesHelper:
         x_comp_size = floor(length / (length2 + padding))
         y_comp_size = floor(width / (length2 + padding))
 
-        x_shapes = series(
-            shape,
-            x_comp_size,
-            length_offset = length_offset
-        )
-        y_shapes = series(
-            shape,
-            y_comp_size,
-            length_offset = length_offset
-        )
-
-        x_plus = (cq.Workplane("XY")
-            .add(x_shapes)
-            .translate((0, y_trans, z_trans)))
-
-        x_minus = (cq.Workplane("XY")
-            .add(x_shapes)
-            .rotate((0,0,1), (0,0,0), 180)
-            .translate((0, -1 * y_trans, z_trans)))
-
-        y_plus = (cq.Workplane("XY")
-            .add(y_shapes)
-            .rotate((0,0,1), (0,0,0), 90)
-            .translate((x_trans, 0, z_trans)))
-
-        y_minus = (cq.Workplane("XY")
-            .add(y_shapes)
-            .rotate((0,0,1), (0,0,0), 90)
-            .rotate((0,0,1), (0,0,0), 180)
-            .translate((-1 * (x_trans), 0, z_trans)))
-
-        scene = (x_plus
-            .add(y_plus)
-            .add(x_minus)
-            .add(y_minus))
-
+        # wall name, copies, rotation, translation
+        walls = [
+            ("x_plus", x_comp_size, 0, (0, y_trans, z_trans)),
+            ("y_plus", y_comp_size, 90, (x_trans, 0, z_trans)),
+            ("x_minus", x_comp_size, 180, (0, -1 * y_trans, z_trans)),
+            ("y_minus", y_comp_size, 270, (-1 * x_trans, 0, z_trans))
+        ]
+
+        solid_count = len(self.shape.solids().vals())
+        rows = []
+        for wall, size, rotation, translation in walls:
+            for panel, offset in enumerate(self.__series_offsets(size)):
+                matrix = placement_matrix(offset, rotation, translation)
+                for solid in range(solid_count):
+                    rows.append((len(rows), wall, panel, solid, matrix))
+
+        self.placements = np.array(rows, dtype=PLACEMENT_DTYPE)
+        return self.placements
+
+    def get_placements(self):
+        '''
+        The placement table filtered by skip_list or keep_list.
+        '''
+        if self.placements is None:
+            self.make_placements()
+
+        placements = self.placements
         if self.skip_list and len(self.skip_list) > 0:
-            solids = scene.solids().vals()
-            scene = cq.Workplane("XY")
-
-            for  index, solid in enumerate(solids):
-                if index not in self.skip_list:
-                    scene.add(solid)
+            placements = placements[~np.isin(placements["index"], self.skip_list)]
         elif self.keep_list and len(self.keep_list) > 0:
-            solids = scene.solids().vals()
-            scene = cq.Workplane("XY")
+            placements = placements[np.isin(placements["index"], self.keep_list)]
+
+        return placements
+
+    def make(self):
+        self.make_placements()
+        solids = self.shape.solids().vals()
 
-            for  index, solid in enumerate(solids):
-                if index in self.keep_list:
-                    scene.add(solid)
+        scene = cq.Workplane("XY")
+        for placement in self.get_placements():
+            location = cq.Location(matrix_to_trsf(placement["matrix"]))
+            scene.add(solids[placement["solid"]].moved(location))
 
         self.scene = scene
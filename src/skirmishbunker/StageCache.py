@@ -0,0 +1,321 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from importlib import metadata
+from types import CodeType, ModuleType
+from OCP.TopoDS import TopoDS_Iterator
+
+def package_version(name):
+    try:
+        return metadata.version(name)
+    except Exception:
+        return "unknown"
+
+class CacheKeyError(Exception):
+    '''
+    Raised for a value no stable cache key can be built from, the stage is not cached.
+    '''
+
+def code_digest(code, digest):
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            code_digest(const, digest)
+        else:
+            digest.update(repr(const).encode("utf-8"))
+
+def code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names |= code_names(const)
+    return names
+
+def reference_key(value, seen):
+    '''
+    Key for a global or closure value referenced by a callable.
+    '''
+    if isinstance(value, ModuleType):
+        return {"module": value.__name__}
+    if isinstance(value, type):
+        return {"type": f"{value.__module__}.{value.__qualname__}"}
+    if callable(value) and hasattr(value, "__code__"):
+        return callable_key(value, seen)
+    if callable(value) and hasattr(value, "__qualname__"):
+        # builtins
+        return {"callable": f"{getattr(value, '__module__', None)}.{value.__qualname__}"}
+    return canonical(value)
+
+def callable_key(value, seen):
+    name = f"{value.__module__}.{value.__qualname__}"
+    if id(value) in seen:
+        return {"callable": name}
+    seen = seen | {id(value)}
+
+    code = value.__code__
+    digest = hashlib.sha256()
+    code_digest(code, digest)
+
+    closure = []
+    for cell in value.__closure__ or ():
+        try:
+            contents = cell.cell_contents
+        except ValueError:
+            # cell not assigned yet
+            contents = None
+        closure.append(reference_key(contents, seen))
+
+    scope = getattr(value, "__globals__", {})
+    referenced = {
+        name: reference_key(scope[name], seen)
+        for name in sorted(code_names(code))
+        if name in scope
+    }
+
+    return {
+        "callable": name,
+        "code": digest.hexdigest(),
+        "closure": closure,
+        "globals": referenced
+    }
+
+# run state and build statistics, never part of a key
+BOOKKEEPING = (
+    "parent", "make_called", "made_stages", "incremental_make",
+    "stage_cache", "stage_executor", "stage_workers",
+    "tile_cull_stats", "merge_stats"
+)
+
+def canonical(value, exclude=()):
+    '''
+    Reduce a parameter value to something json can serialize in a stable way.
+    Callables are keyed by their qualified name, bytecode, closure and the globals they read,
+    objects by their class and non shape attributes.
+    '''
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+
+    if isinstance(value, dict):
+        return {str(key): canonical(item) for key, item in value.items()}
+
+    if isinstance(value, (set, frozenset)):
+        return sorted((canonical(item) for item in value), key=repr)
+
+    if callable(value) and hasattr(value, "__code__"):
+        return callable_key(value, frozenset())
+
+    if isinstance(value, (cq.Workplane, cq.Shape)):
+        raise CacheKeyError(f"Can not build a cache key from {type(value).__name__}")
+
+    if hasattr(value, "__dict__"):
+        attributes = {}
+        for key, item in vars(value).items():
+            # private attributes, like TrackedParams' _changed, are bookkeeping too
+            if key in exclude or key in BOOKKEEPING or key.startswith("_"):
+                continue
+            if isinstance(item, (cq.Workplane, cq.Shape)):
+                continue
+            attributes[key] = canonical(item)
+
+        return {
+            "class": f"{type(value).__module__}.{type(value).__qualname__}",
+            "attributes": attributes
+        }
+
+    raise CacheKeyError(f"Can not build a cache key from {type(value).__name__}")
+
+def dump_outputs(outputs):
+    '''
+    Split stage outputs into json friendly meta and a list of shapes.
+    '''
+    meta = {"outputs": {}, "shape_count": 0}
+    shapes = []
+    for name, value in outputs.items():
+        if isinstance(value, cq.Workplane):
+            vals = [val for val in value.vals() if isinstance(val, cq.Shape)]
+            meta["outputs"][name] = {"shapes": [len(shapes), len(vals)]}
+            shapes.extend(vals)
+        else:
+            meta["outputs"][name] = {"value": value}
+    meta["shape_count"] = len(shapes)
+    return meta, shapes
+
+def load_outputs(meta, compound):
+    '''
+    Inverse of dump_outputs, compound holds the shapes in order.
+    '''
+    shapes = []
+    if compound is not None:
+        iterator = TopoDS_Iterator(compound.wrapped)
+        while iterator.More():
+            shapes.append(cq.Shape.cast(iterator.Value()))
+            iterator.Next()
+
+    outputs = {}
+    for name, output in meta["outputs"].items():
+        if "shapes" in output:
+            start, count = output["shapes"]
+            outputs[name] = cq.Workplane("XY").add(shapes[start:start + count])
+        else:
+            outputs[name] = output["value"]
+    return outputs
+
+def outputs_to_bytes(outputs):
+    meta, shapes = dump_outputs(outputs)
+    data = None
+    if shapes:
+        stream = BytesIO()
+        cq.Compound.makeCompound(shapes).exportBrep(stream)
+        data = stream.getvalue()
+    return meta, data
+
+def outputs_from_bytes(meta, data):
+    compound = None
+    if data:
+        compound = cq.Shape.importBrep(BytesIO(data))
+    return load_outputs(meta, compound)
+
+class StageCache:
+    '''
+    Content addressed on-disk cache for the shapes produced by a make stage.
+
+    Every entry is a directory named after the key holding a meta.json
+    and a shapes.brep file. Entries are written to a temporary directory
+    and renamed into place so concurrent writers never see partial entries.
+    When max_size (bytes) is set the least recently used entries are evicted.
+    '''
+    def __init__(self, path, max_size=None):
+        self.path = path
+        self.max_size = max_size
+
+        self.versions = {
+            "skirmishbunker": package_version("skirmishbunker"),
+            "cqterrain": package_version("cqterrain"),
+            "cadquery": cq.__version__
+        }
+
+        os.makedirs(self.path, exist_ok=True)
+
+    def make_key(self, stage_name, params):
+        payload = json.dumps({
+            "stage": stage_name,
+            "params": params,
+            "versions": self.versions
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def __entry_path(self, key):
+        return os.path.join(self.path, key)
+
+    def get(self, key):
+        entry = self.__entry_path(key)
+        meta_path = os.path.join(entry, "meta.json")
+
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+
+            compound = None
+            if meta["shape_count"] > 0:
+                compound = cq.Shape.importBrep(os.path.join(entry, "shapes.brep"))
+            outputs = load_outputs(meta, compound)
+
+            # mark as recently used
+            os.utime(meta_path)
+        except Exception:
+            # entry evicted or replaced while reading
+            return None
+
+        return outputs
+
+    def put(self, key, outputs):
+        entry = self.__entry_path(key)
+
+        if os.path.exists(entry):
+            return
+
+        meta, shapes = dump_outputs(outputs)
+
+        temp_entry = tempfile.mkdtemp(prefix=".tmp-", dir=self.path)
+        try:
+            if shapes:
+                compound = cq.Compound.makeCompound(shapes)
+                compound.exportBrep(os.path.join(temp_entry, "shapes.brep"))
+
+            with open(os.path.join(temp_entry, "meta.json"), "w") as meta_file:
+                json.dump(meta, meta_file)
+
+            os.rename(temp_entry, entry)
+        except OSError:
+            # another writer got there first
+            return
+        finally:
+            # gone after a successful rename, otherwise no partial entry is left behind
+            shutil.rmtree(temp_entry, ignore_errors=True)
+
+        if self.max_size:
+            self.evict()
+
+    def entries(self):
+        '''
+        List of (last used, size, path) for every complete entry.
+        '''
+        entries = []
+        for name in os.listdir(self.path):
+            entry = os.path.join(self.path, name)
+            meta_path = os.path.join(entry, "meta.json")
+
+            if name.startswith(".") or not os.path.exists(meta_path):
+                continue
+
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(entry, file_name))
+                    for file_name in os.listdir(entry)
+                )
+                entries.append((os.path.getmtime(meta_path), size, entry))
+            except OSError:
+                continue
+
+        return entries
+
+    def size(self):
+        return sum(size for last_used, size, entry in self.entries())
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for last_used, size, entry in entries)
+
+        for last_used, size, entry in entries:
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for last_used, size, entry in self.entries():
+            shutil.rmtree(entry, ignore_errors=True)
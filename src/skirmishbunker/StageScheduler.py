@@ -0,0 +1,205 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .bunkerStages import BUNKER_STAGES, lookup_stage, execute_stage, store_stage, apply_outputs, collect_outputs
+from .StageCache import outputs_to_bytes, outputs_from_bytes
+from .PerformanceConfig import performance_config, configure_worker
+from .Instrumentation import Instrumentation, instrument, stack_snapshot, run_with_stack, merge_records
+import time
+
+# never shipped to a worker process
+SKIP_STATE = ("parent", "roof_bp", "stage_cache", "stage_executor")
+
+def parameter_state(obj):
+    '''
+    Picklable snapshot of the parameters on obj, shapes are left behind.
+    '''
+    state = {}
+    for key, value in vars(obj).items():
+        if key in SKIP_STATE or isinstance(value, (cq.Workplane, cq.Shape)):
+            continue
+
+        if hasattr(value, "__dict__") and not callable(value):
+            value = ("object", type(value), parameter_state(value))
+
+        state[key] = value
+    return state
+
+def restore_state(obj, state):
+    for key, value in state.items():
+        if isinstance(value, tuple) and len(value) == 3 and value[0] == "object":
+            child = value[1]()
+            restore_state(child, value[2])
+            value = child
+        setattr(obj, key, value)
+
+def picklable(state):
+    try:
+        pickle.dumps(state)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        # lambdas and local functions raise PicklingError or AttributeError
+        return False
+    return True
+
+def run_stage_in_process(state, stage_name, instrumented=False):
+    '''
+    Process pool entry point, makes one stage on a fresh Bunker
+    and ships the outputs back as BREP along with any instrumentation records.
+    '''
+    from .Bunker import Bunker
+
+    stage = [stage for stage in BUNKER_STAGES if stage["name"] == stage_name][0]
+    bunker = Bunker()
+    restore_state(bunker, state)
+
+    if not instrumented:
+        execute_stage(bunker, stage)
+        return outputs_to_bytes(collect_outputs(bunker, stage)), []
+
+    with Instrumentation() as stats:
+        with instrument(f"Bunker.{stage_name}") as record:
+            execute_stage(bunker, stage)
+            outputs = collect_outputs(bunker, stage)
+            record.outputs(*outputs.values())
+    return outputs_to_bytes(outputs), stats.records
+
+class StageScheduler:
+    '''
+    Runs make stages in dependency order.
+
+    executor is "serial", "thread", "process" or a concurrent.futures
+    Executor owned by the caller, which lets a pool be reused between bunkers.
+    Process workers get a parameter snapshot of the bunker and send
+    their shapes back as BREP, custom callbacks need to be picklable.
+
+    The thread and process executors are experimental. On the default bunker
+    they are no faster than serial: the stages are short, OCC already threads
+    the booleans, and process workers pay for the BREP round trip.
+    '''
+    def __init__(self, executor="serial", workers=None):
+        self.executor = executor
+        self.workers = workers
+
+    def __make_executor(self):
+        if isinstance(self.executor, Executor):
+            return self.executor, False
+
+        if self.executor == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers), True
+
+        if self.executor == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=configure_worker,
+                initargs=(performance_config.settings(),)
+            ), True
+
+        raise Exception(f"Unrecognized stage executor {self.executor}")
+
+    def run(self, bunker, stages):
+        if self.executor == "serial":
+            for stage in stages:
+                self.__run_local(bunker, stage)
+            return
+
+        executor, owned = self.__make_executor()
+        try:
+            self.__run_graph(bunker, stages, executor)
+        finally:
+            if owned:
+                executor.shutdown()
+
+    def __run_local(self, bunker, stage):
+        with instrument(f"Bunker.{stage['name']}") as record:
+            key, outputs = lookup_stage(bunker, stage)
+
+            if outputs is not None:
+                apply_outputs(bunker, outputs)
+            else:
+                execute_stage(bunker, stage)
+                store_stage(bunker, stage, key)
+
+            record.outputs(*collect_outputs(bunker, stage).values())
+
+    def __submit(self, bunker, stage, executor):
+        if not isinstance(executor, ProcessPoolExecutor):
+            future = executor.submit(run_with_stack, stack_snapshot(), self.__run_local, bunker, stage)
+            return future, None
+
+        # prepare and cache lookups stay in this process
+        key, outputs = lookup_stage(bunker, stage)
+        if outputs is not None:
+            apply_outputs(bunker, outputs)
+            return None, None
+
+        state = parameter_state(bunker)
+        if not picklable(state):
+            # unpicklable custom callback, make it here instead
+            with instrument(f"Bunker.{stage['name']}"):
+                execute_stage(bunker, stage)
+            store_stage(bunker, stage, key)
+            return None, None
+
+        future = executor.submit(
+            run_stage_in_process,
+            state,
+            stage["name"],
+            stack_snapshot() is not None
+        )
+        future.submitted = time.perf_counter()
+        return future, key
+
+    def __finish(self, bunker, stage, future, key, executor):
+        if not isinstance(executor, ProcessPoolExecutor):
+            future.result()
+            return
+
+        (meta, data), records = future.result()
+        apply_outputs(bunker, outputs_from_bytes(meta, data))
+        merge_records(records, time.perf_counter() - future.submitted)
+        store_stage(bunker, stage, key)
+
+    def __run_graph(self, bunker, stages, executor):
+        names = [stage["name"] for stage in stages]
+        waiting = list(stages)
+        done = set()
+        running = {}
+
+        while waiting or running:
+            submitted = False
+            for stage in list(waiting):
+                # dependencies on disabled stages are ignored
+                depends = [name for name in stage["depends"] if name in names]
+                if all(name in done for name in depends):
+                    waiting.remove(stage)
+                    submitted = True
+                    future, key = self.__submit(bunker, stage, executor)
+                    if future is None:
+                        done.add(stage["name"])
+                    else:
+                        running[future] = (stage, key)
+
+            if not running:
+                if waiting and not submitted:
+                    raise Exception("Stage dependencies can not be resolved")
+                continue
+
+            finished, pending = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, key = running.pop(future)
+                self.__finish(bunker, stage, future, key, executor)
+                done.add(stage["name"])
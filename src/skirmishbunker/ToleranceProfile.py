@@ -0,0 +1,76 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from OCP.BRepMesh import BRepMesh_IncrementalMesh
+from OCP.BRepTools import BRepTools
+from .PerformanceConfig import performance_config
+
+class ToleranceProfile:
+    '''
+    Linear / angular mesh tolerances for planar and curved faces, with
+    per component overrides, a component name mapped to another profile.
+
+        profile = ToleranceProfile(
+            planar=(0.5, 0.5),
+            curved=(0.05, 0.1),
+            components={"tiles": "draft"}
+        )
+
+    Curved faces are meshed first, a planar face then reuses the edges it
+    shares with them, so the mesh stays closed.
+    '''
+    def __init__(self, planar=(0.1, 0.1), curved=(0.1, 0.1), components=None):
+        self.planar = planar
+        self.curved = curved
+        self.components = components or {}
+
+    def for_component(self, name):
+        profile = self.components.get(name, self)
+        if isinstance(profile, str):
+            return tolerance_profile(profile)
+        return profile
+
+    def mesh(self, shape):
+        '''
+        Triangulates shape in place, returns the tolerances to export it with.
+        Any earlier triangulation is dropped first, BRepMesh would keep one finer than
+        this profile and shared component shapes would export differently by history.
+        '''
+        parallel = performance_config.parallel_mesh
+        BRepTools.Clean_s(shape.wrapped)
+        if self.curved != self.planar:
+            for face in shape.Faces():
+                if face.geomType() != "PLANE":
+                    BRepMesh_IncrementalMesh(face.wrapped, self.curved[0], True, self.curved[1], parallel)
+
+        # faces already meshed finer are kept as they are
+        coarsest = (max(self.planar[0], self.curved[0]), max(self.planar[1], self.curved[1]))
+        BRepMesh_IncrementalMesh(shape.wrapped, coarsest[0], True, coarsest[1], parallel)
+        return coarsest
+
+PROFILES = {
+    "draft": ToleranceProfile(planar=(0.5, 0.5), curved=(0.25, 0.3)),
+    "standard": ToleranceProfile(planar=(0.1, 0.1), curved=(0.1, 0.1)),
+    "fine": ToleranceProfile(planar=(0.1, 0.1), curved=(0.02, 0.05))
+}
+
+def tolerance_profile(profile):
+    '''
+    A ToleranceProfile from a profile or one of the PROFILES names.
+    '''
+    if isinstance(profile, ToleranceProfile):
+        return profile
+    if profile not in PROFILES:
+        raise Exception(f"Unknown tolerance profile {profile}")
+    return PROFILES[profile]
@@ -0,0 +1,55 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+COMPARABLE = (type(None), bool, int, float, str, list, tuple)
+
+def snapshot(value):
+    # nested lists are copied, so an in place edit shows up as a difference
+    if isinstance(value, list):
+        return [snapshot(item) for item in value]
+    return value
+
+class TrackedParams:
+    '''
+    Records the attributes assigned a different value since clear_changed was called.
+    List attributes are also compared with a copy taken by clear_changed,
+    so lists mutated in place count as changed.
+    '''
+    def __setattr__(self, name, value):
+        changed = self.__dict__.get("_changed")
+
+        if changed is not None:
+            old = self.__dict__.get(name, changed)
+            if old is not value:
+                if not (isinstance(old, COMPARABLE) and isinstance(value, COMPARABLE) and old == value):
+                    changed.add(name)
+
+        super().__setattr__(name, value)
+
+    def changed_params(self):
+        changed = set(self.__dict__.get("_changed") or ())
+
+        for name, old in (self.__dict__.get("_lists") or {}).items():
+            if name not in changed and snapshot(self.__dict__.get(name)) != old:
+                changed.add(name)
+
+        return changed
+
+    def clear_changed(self):
+        self.__dict__["_changed"] = set()
+        self.__dict__["_lists"] = {
+            name: snapshot(value)
+            for name, value in self.__dict__.items()
+            if isinstance(value, list) and not name.startswith("_")
+        }
@@ -1,8 +1,49 @@
-from .Bunker import Bunker
-from .BlastDoor import BlastDoor
-from .SplitDoor import SplitDoor
-from .DetailedRoof import DetailedRoof
-from .Hatch import Hatch
-from .Catwalk import Catwalk
-from .FlatRoof import FlatRoof
-from .SeriesHelper import SeriesHelper
\ No newline at end of file
+import importlib
+import sys
+import types
+
+# Exported names are imported on first access,
+# so importing the package does not load cadquery / OCC.
+_exports = {
+    "Bunker": ".Bunker",
+    "BlastDoor": ".BlastDoor",
+    "SplitDoor": ".SplitDoor",
+    "DetailedRoof": ".DetailedRoof",
+    "Hatch": ".Hatch",
+    "Catwalk": ".Catwalk",
+    "FlatRoof": ".FlatRoof",
+    "SeriesHelper": ".SeriesHelper",
+    "StageCache": ".StageCache",
+    "ComponentLibrary": ".ComponentLibrary",
+    "component_library": ".ComponentLibrary",
+    "StageScheduler": ".StageScheduler",
+    "Instrumentation": ".Instrumentation",
+    "PerformanceConfig": ".PerformanceConfig",
+    "performance_config": ".PerformanceConfig",
+    "ToleranceProfile": ".ToleranceProfile",
+    "StlWriter": ".stlStream",
+    "stream_stl": ".stlStream"
+}
+
+__all__ = list(_exports)
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(_exports[name], __name__)
+    globals()[name] = getattr(module, name)
+    return globals()[name]
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # importing a submodule binds it on the package under its own name,
+        # which is also the name of the class it exports, keep the class
+        if name in _exports and isinstance(value, types.ModuleType) and value.__name__ == __name__ + _exports[name]:
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+sys.modules[__name__].__class__ = _Package
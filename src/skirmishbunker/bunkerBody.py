@@ -30,6 +30,11 @@ def init_body_params(self):
     self.render_interior=True
     self.render_base=True
 
+    # skip the clean after each boolean, merge same domain faces once per build instead,
+    # the face / edge counts of every merge are kept in merge_stats
+    self.merge_faces = False
+    self.merge_stats = None
+
     self.wedge = None
     self.interior_rectangle = None
     self.base = None
@@ -14,6 +14,7 @@
 
 import cadquery as cq
 from .BlastDoor import BlastDoor
+from .ComponentLibrary import component_library
 
 def init_door_params(self):
     self.render_doors=True
@@ -67,6 +68,15 @@ def make_cut_doors(self):
         z_translate=0, skip_list=None, keep_list=self.door_panels
     )
 
+def make_blast_door(self):
+    bp = BlastDoor()
+    bp.length = self.door_length
+    bp.width = self.door_width
+    bp.height = self.door_height
+    bp.fillet = self.door_fillet
+    bp.make()
+    return bp.build()
+
 def make_doors(self):
     height = self.height
 
@@ -78,13 +88,16 @@ def make_doors(self):
     if self.custom_door:
         door = self.custom_door(self)
     else:
-        bp = BlastDoor()
-        bp.length = self.door_length
-        bp.width = self.door_width
-        bp.height = self.door_height
-        bp.fillet = self.door_fillet
-        bp.make()
-        door = bp.build().translate((
+        door = component_library.get(
+            "BlastDoor",
+            {
+                "length": self.door_length,
+                "width": self.door_width,
+                "height": self.door_height,
+                "fillet": self.door_fillet
+            },
+            lambda: make_blast_door(self)
+        ).translate((
             0,
             0,
             -1 * (height / 2 - self.door_height / 2) + floor_thickness
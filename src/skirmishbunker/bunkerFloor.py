@@ -12,9 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import cadquery as cq
 from cqterrain import tile
-from cadqueryhelper import grid
 from math import floor as math_floor
+from .ComponentLibrary import component_library
+from .instancedGrid import make_instanced_grid
 
 def init_floor_params(self):
     self.render_floor_tiles=True
@@ -27,8 +29,59 @@ def init_floor_params(self):
 
     self.custom_floor_tile = None
 
+    # grid, sketch
+    # sketch draws every tile in one 2D sketch and extrudes a single floor plate
+    self.floor_engine = "grid"
+
     self.interior_tiles = None
 
+def octagon_plate(tile_size, chamfer_size, mid_tile_size, spacing, tile_height, columns, rows):
+    '''
+    The grid of tile.octagon_with_dots_2 laid out as one sketch and extruded once.
+    Octagons sit on the cell centers, the dots on the cell corners,
+    clipped to the outline of the grid.
+    '''
+    step = tile_size + spacing
+    length = step * rows
+    width = step * columns
+
+    half = tile_size / 2
+    inner = half - chamfer_size
+    octagon = [
+        (half, -inner), (half, inner), (inner, half), (-inner, half),
+        (-half, inner), (-half, -inner), (-inner, -half), (inner, -half)
+    ]
+
+    centers = [
+        (step * row + step / 2 - length / 2, step * column + step / 2 - width / 2)
+        for row in range(rows) for column in range(columns)
+    ]
+    corners = [
+        (step * row - length / 2, step * column - width / 2)
+        for row in range(rows + 1) for column in range(columns + 1)
+    ]
+
+    sketch = cq.Sketch().push(centers)
+    if chamfer_size:
+        sketch = sketch.polygon(octagon)
+    else:
+        sketch = sketch.rect(tile_size, tile_size)
+
+    sketch = (
+        sketch.reset()
+        .push(corners)
+        .rect(mid_tile_size, mid_tile_size, angle=45)
+        .reset()
+        .rect(length, width, mode="i")
+    )
+
+    return (
+        cq.Workplane("XY")
+        .placeSketch(sketch)
+        .extrude(tile_height)
+        .translate((0, 0, -tile_height / 2))
+    )
+
 def make_interior_floor(self):
     tile_size = self.floor_tile_size
     tile_padding = self.floor_tile_padding
@@ -40,14 +93,39 @@ def make_interior_floor(self):
     else:
         floor_thickness = self.wall_width
 
-    if self.custom_floor_tile:
-        floor_tile = self.custom_floor_tile(self)
-    else:
-        floor_tile = tile.octagon_with_dots_2(tile_size, self.floor_chamfer_size, self.floor_mid_tile_size, tile_padding, self.floor_tile_height)
-
     columns = math_floor(int_width/(tile_size + tile_padding))
     rows = math_floor(int_length/(tile_size + tile_padding))
-    tile_grid = grid.make_grid(part=floor_tile, dim = [tile_size + tile_padding, tile_size + tile_padding], columns = columns, rows = rows)
     z_tile_translate = -1 * (self.height / 2 - self.floor_tile_height / 2 - floor_thickness)
 
-    self.interior_tiles = tile_grid.translate((0,0,z_tile_translate))
+    if self.floor_engine not in ("grid", "sketch"):
+        raise Exception(f"Unrecognized floor engine {self.floor_engine}")
+
+    if self.floor_engine == "sketch" and not self.custom_floor_tile and rows and columns:
+        tile_grid = octagon_plate(
+            tile_size,
+            self.floor_chamfer_size,
+            self.floor_mid_tile_size,
+            tile_padding,
+            self.floor_tile_height,
+            columns,
+            rows
+        ).translate((0,0,z_tile_translate))
+    else:
+        if self.custom_floor_tile:
+            floor_tile = self.custom_floor_tile(self)
+        else:
+            floor_tile = component_library.get(
+                "octagon_with_dots_2",
+                [tile_size, self.floor_chamfer_size, self.floor_mid_tile_size, tile_padding, self.floor_tile_height],
+                lambda: tile.octagon_with_dots_2(tile_size, self.floor_chamfer_size, self.floor_mid_tile_size, tile_padding, self.floor_tile_height)
+            )
+
+        tile_grid = make_instanced_grid(
+            part = floor_tile,
+            dim = [tile_size + tile_padding, tile_size + tile_padding],
+            columns = columns,
+            rows = rows,
+            translate = (0, 0, z_tile_translate)
+        )
+
+    self.interior_tiles = tile_grid
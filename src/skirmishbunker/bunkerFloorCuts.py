@@ -22,6 +22,10 @@ def init_floor_cut(self):
 
     self.floor_cut_panels = [0]
 
+    # leave out the floor tiles the floor cuts would remove entirely
+    self.cull_covered_tiles = False
+    self.tile_cull_stats = None
+
     self.floor_cuts = None
 
 def make_floor_cuts(self):
@@ -14,6 +14,7 @@
 
 import cadquery as cq
 from cadqueryhelper import shape
+from .ComponentLibrary import component_library
 
 def init_bunker_params(self):
     self.render_panel_details=True
@@ -50,7 +51,7 @@ def make_cut_panels(self):
     y_translate = self.width/2
     self.cut_panels = self.make_series(cut_panel, length_offset=self.panel_padding*2, x_translate=x_translate,y_translate=y_translate, z_translate=0)
 
-def arch_detail(self):
+def make_arch_detail(self):
     height = self.height
     p_length = self.panel_length
     p_width = self.panel_width
@@ -72,6 +73,20 @@ def arch_detail(self):
     panel = panel_outline.intersect(panel_detail).cut(inner_arch).add(inside_arch)
     return panel
 
+def arch_detail(self):
+    params = {
+        "height": self.height,
+        "panel_length": self.panel_length,
+        "panel_width": self.panel_width,
+        "panel_padding": self.panel_padding,
+        "arch_padding_top": self.arch_padding_top,
+        "arch_padding_sides": self.arch_padding_sides,
+        "arch_inner_height": self.arch_inner_height,
+        "inner_arch_top": self.inner_arch_top,
+        "inner_arch_sides": self.inner_arch_sides
+    }
+    return component_library.get("arch_detail", params, lambda: make_arch_detail(self))
+
 def make_detail_panels(self):
     height = self.height
     p_length = self.panel_length
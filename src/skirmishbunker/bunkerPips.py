@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import cadquery as cq
+from .pointPattern import corner_points, make_cylinders, pattern_fit
 
 def init_pip_params(self):
     self.render_pips = False
@@ -23,40 +23,46 @@ def init_pip_params(self):
     self.pips = None
     self.cut_pips = None
 
-def make_pips(self):
-    pip = cq.Workplane("XY").cylinder(self.pip_height, self.pip_radius)
-    if self.render_magnets:
-        pip = cq.Workplane("XY").cylinder(self.pip_height, self.pip_radius)
+def pip_points(self):
+    '''
+    The pip centers, configure_roof hands the same points to the roof for its holes.
+    '''
+    return corner_points(
+        self.length - 2 * self.inset,
+        self.width - 2 * self.inset,
+        self.pip_padding,
+        self.pip_radius
+    )
 
-    x_translate = self.length/2-self.inset-self.pip_radius-self.pip_padding
-    y_translate = self.width/2-self.inset-self.pip_radius-self.pip_padding
+def cut_pip_points(self):
+    return corner_points(self.length, self.width, self.pip_padding, self.pip_radius)
+
+def make_pips(self):
     z_translate = self.height/2+self.pip_height/2
 
     if self.render_magnets:
         z_translate = self.height/2-self.pip_height/2
 
-    pips = (
-        cq.Workplane("XY")
-        .union(pip.translate((x_translate, y_translate, z_translate)))
-        .union(pip.translate((-1*x_translate, y_translate, z_translate)))
-        .union(pip.translate((-1*x_translate, -1*y_translate, z_translate)))
-        .union(pip.translate((x_translate, -1*y_translate, z_translate)))
-
-    )
-    self.pips = pips
+    self.pips = make_cylinders(pip_points(self), self.pip_height, self.pip_radius, z_translate)
 
 def make_cut_pips(self):
-    pip = cq.Workplane("XY").cylinder(self.pip_height, self.pip_radius)
-
-    x_translate = self.length/2-self.pip_radius-self.pip_padding
-    y_translate = self.width/2-self.pip_radius-self.pip_padding
     z_translate = -1*(self.height/2 + self.base_height - self.pip_height/2)
+    self.cut_pips = make_cylinders(cut_pip_points(self), self.pip_height, self.pip_radius, z_translate)
 
-    pips = (
-        cq.Workplane("XY")
-        .union(pip.translate((x_translate, y_translate, z_translate)))
-        .union(pip.translate((-1*x_translate, y_translate, z_translate)))
-        .union(pip.translate((-1*x_translate, -1*y_translate, z_translate)))
-        .union(pip.translate((x_translate, -1*y_translate, z_translate)))
-    )
-    self.cut_pips = pips
+def roof_hole_radius(self):
+    return ((self.pip_radius * 2) * self.roof_pip_hole_mod)/2
+
+def roof_hole_fit(self):
+    '''
+    Checks the pips against the roof's holes without building either.
+    Uses the configured roof when there is one, otherwise what configure_roof would set,
+    the roof is not configured here.
+    '''
+    if self.roof_bp:
+        holes = self.roof_bp.hole_points()
+        hole_radius = self.roof_bp.hole_radius
+    else:
+        holes = pip_points(self)
+        hole_radius = roof_hole_radius(self)
+
+    return pattern_fit(pip_points(self), self.pip_radius, holes, hole_radius)
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from .DetailedRoof import DetailedRoof
+from .bunkerPips import pip_points, roof_hole_radius
 
 def init_roof_params(self):
     self.render_roof = True
@@ -45,7 +46,7 @@ def init_roof_params(self):
     self.roof_body = None
     self.roof_bp = None
 
-def make_roof(self):
+def configure_roof(self):
     length = self.length - (2 * (self.inset - self.roof_overflow))
     width = self.width - (2 * (self.inset - self.roof_overflow))
 
@@ -69,6 +70,8 @@ def make_roof(self):
     bp.tile_size = self.roof_tile_size
     bp.tile_padding = self.roof_tile_padding
     bp.tile_height = self.roof_tile_height
+    bp.cull_covered_tiles = self.cull_covered_tiles
+    bp.merge_faces = self.merge_faces
 
     bp.render_hatches = self.render_ladders
     bp.render_hatch_cuts = self.render_ladders
@@ -86,10 +89,15 @@ def make_roof(self):
     else:
         bp.cut_holes = False
 
-    bp.hole_radius = ((self.pip_radius * 2) * self.roof_pip_hole_mod)/2
+    bp.hole_radius = roof_hole_radius(self)
     bp.hole_depth = self.pip_height * self.roof_pip_hole_mod
     bp.hole_inset = self.pip_padding
+    # the holes sit on the pips, not on the roof's own corner math
+    bp.hole_pattern = pip_points(self).tolist()
 
     bp.roof_overflow = self.roof_overflow
-    bp.make()
     self.roof_bp = bp
+
+def make_roof(self):
+    configure_roof(self)
+    self.roof_bp.make()
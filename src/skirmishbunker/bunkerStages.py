@@ -0,0 +1,312 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .bunkerBody import make_wedge, make_interior_rectangle, make_base
+from .bunkerPanels import make_cut_panels, make_detail_panels
+from .bunkerWindows import make_cut_windows, make_windows
+from .bunkerDoors import make_cut_doors, make_doors
+from .bunkerRoof import configure_roof, make_roof
+from .bunkerFloor import make_interior_floor
+from .bunkerLadders import make_ladders
+from .bunkerFloorCuts import make_floor_cuts
+from .bunkerPips import make_pips, make_cut_pips
+from .StageCache import canonical, CacheKeyError
+
+# parameters read by Bunker.make_series
+SERIES_PARAMS = ["int_length", "int_width", "panel_length", "panel_padding"]
+
+# Every stage Bunker.make runs, in the order it runs them serially.
+# depends lists the stages whose outputs the stage reads
+# params lists every attribute the stage reads
+# outputs lists every attribute the stage writes
+BUNKER_STAGES = [
+    {
+        "name": "wedge",
+        "depends": [],
+        "flag": None,
+        "run": [make_wedge],
+        "params": ["length", "width", "height", "inset", "corner_chamfer"],
+        "outputs": ["wedge"]
+    },
+    {
+        "name": "interior",
+        "depends": [],
+        "flag": None,
+        "run": [make_interior_rectangle],
+        "params": ["length", "width", "height", "inset", "wall_width", "floor_thickness"],
+        "outputs": ["int_length", "int_width", "interior_rectangle"]
+    },
+    {
+        "name": "base",
+        "depends": [],
+        "flag": "render_base",
+        "run": [make_base],
+        "params": ["length", "width", "height", "base_height", "corner_chamfer"],
+        "outputs": ["base"]
+    },
+    {
+        "name": "cut_panels",
+        "depends": ["interior"],
+        "flag": "render_cut_panels",
+        "run": [make_cut_panels],
+        "params": SERIES_PARAMS + [
+            "length", "width", "height", "angle", "panel_width"
+        ],
+        "outputs": ["cut_panels"]
+    },
+    {
+        "name": "detail_panels",
+        "depends": ["interior"],
+        "flag": "render_panel_details",
+        "run": [make_detail_panels],
+        "params": SERIES_PARAMS + [
+            "length", "width", "height", "angle", "panel_width",
+            "arch_padding_top", "arch_padding_sides", "arch_inner_height",
+            "inner_arch_top", "inner_arch_sides"
+        ],
+        "outputs": ["panels"]
+    },
+    {
+        "name": "windows",
+        "depends": ["interior"],
+        "flag": "render_windows",
+        "run": [make_cut_windows, make_windows],
+        "params": SERIES_PARAMS + [
+            "height", "inset", "wall_width", "window_length", "window_width",
+            "window_height", "window_width_offset", "window_frame_width",
+            "window_frame_chamfer", "window_frame_chamfer_select",
+            "skip_windows", "render_doors", "door_panels",
+            "render_ladders", "ladder_panels",
+            "custom_cut_window", "custom_cut_window_padding",
+            "custom_window", "custom_window_padding"
+        ],
+        "outputs": ["cut_windows", "windows"]
+    },
+    {
+        "name": "doors",
+        "depends": ["interior"],
+        "flag": "render_doors",
+        "run": [make_cut_doors, make_doors],
+        "params": SERIES_PARAMS + [
+            "height", "inset", "wall_width", "floor_thickness",
+            "door_panels", "door_length", "door_width", "door_height",
+            "door_fillet", "custom_cut_door", "custom_cut_door_padding",
+            "custom_door", "custom_door_padding"
+        ],
+        "outputs": ["cut_doors", "doors"]
+    },
+    {
+        "name": "ladders",
+        "depends": ["interior"],
+        "flag": "render_ladders",
+        "run": [make_ladders],
+        "params": SERIES_PARAMS + [
+            "height", "ladder_panels", "ladder_length",
+            "ladder_z_translate", "custom_ladder"
+        ],
+        "outputs": ["ladders"]
+    },
+    {
+        "name": "roof",
+        "depends": ["interior"],
+        "flag": "render_roof",
+        "prepare": configure_roof,
+        "run": [make_roof],
+        "params": [
+            "length", "width", "inset", "wall_width", "corner_chamfer",
+            "int_length", "int_width", "panel_length", "panel_padding",
+            "roof_height", "roof_inset", "roof_overflow",
+            "roof_chamfer_faces_selector", "roof_chamfer_edges_selector",
+            "roof_chamfer_operation", "render_floor_tiles", "cull_covered_tiles", "merge_faces",
+            "roof_tile_size", "roof_tile_padding", "roof_tile_height",
+            "render_ladders", "ladder_panels",
+            "roof_hatch_length", "roof_hatch_width",
+            "roof_hatch_radius", "roof_hatch_height",
+            "render_pips", "render_magnets", "pip_radius", "pip_height",
+            "pip_padding", "roof_pip_hole_mod",
+            # the configured roof, picks up any overrides made on roof_object
+            "roof_object", "roof_bp"
+        ],
+        "outputs": [
+            "roof_bp.make_called", "roof_bp.angle", "roof_bp.outline", "roof_bp.roof_body",
+            "roof_bp.tiles", "roof_bp.hatches", "roof_bp.cut_hatches",
+            "roof_bp.holes", "roof_bp.cut_walls", "roof_bp.wall_details"
+        ]
+    },
+    {
+        "name": "floor_tiles",
+        "depends": ["interior"],
+        "flag": "render_floor_tiles",
+        "run": [make_interior_floor],
+        "params": [
+            "int_length", "int_width", "height", "wall_width",
+            "floor_thickness", "floor_padding", "floor_tile_size",
+            "floor_tile_height", "floor_chamfer_size",
+            "floor_mid_tile_size", "floor_tile_padding", "custom_floor_tile",
+            "floor_engine"
+        ],
+        "outputs": ["interior_tiles"]
+    },
+    {
+        "name": "floor_cuts",
+        "depends": ["interior"],
+        "flag": "render_floor_cuts",
+        "run": [make_floor_cuts],
+        "params": SERIES_PARAMS + [
+            "height", "wall_width", "floor_thickness", "base_height",
+            "floor_tile_height", "floor_cut_length", "floor_cut_width",
+            "floor_cut_chamfer", "floor_cut_panels"
+        ],
+        "outputs": ["floor_cuts"]
+    },
+    {
+        "name": "pips",
+        "depends": [],
+        "flag": "render_pips",
+        "run": [make_pips, make_cut_pips],
+        "params": [
+            "length", "width", "height", "inset", "base_height",
+            "render_magnets", "pip_radius", "pip_height", "pip_padding"
+        ],
+        "outputs": ["pips", "cut_pips"]
+    }
+]
+
+def _resolve_path(self, path):
+    target = self
+    names = path.split(".")
+    for name in names[:-1]:
+        target = getattr(target, name)
+    return target, names[-1]
+
+def stage_enabled(self, stage):
+    if stage["flag"] is None:
+        return True
+
+    return getattr(self, stage["flag"])
+
+def stage_inputs(stage):
+    '''
+    The params of stage plus its render flag, turning a stage back on re-makes it.
+    '''
+    if stage["flag"] is None:
+        return stage["params"]
+    return stage["params"] + [stage["flag"]]
+
+def changed_params(self):
+    changed = self.changed_params()
+
+    # overrides made on the roof object directly
+    if self.roof_object.changed_params():
+        changed.add("roof_object")
+
+    return changed
+
+def dirty_stages(self, stages):
+    '''
+    The stages that need to run again, stages are in dependency order.
+    A stage is dirty when it never ran, a parameter it reads or its flag changed
+    or a stage it depends on is dirty.
+    '''
+    changed = changed_params(self)
+
+    dirty = []
+    names = set()
+    for stage in stages:
+        if (
+            stage["name"] not in self.made_stages
+            or changed.intersection(stage_inputs(stage))
+            or names.intersection(stage["depends"])
+        ):
+            dirty.append(stage)
+            names.add(stage["name"])
+
+    return dirty
+
+def forget_stale_stages(self, ran):
+    '''
+    Called before the changes are cleared. Stages that did not run but read a changed
+    parameter, or depend on a stage that ran, are dropped from made_stages
+    so they are made again once enabled.
+    '''
+    changed = changed_params(self)
+    stale = set(ran)
+    for stage in BUNKER_STAGES:
+        if stage["name"] in ran:
+            continue
+        if changed.intersection(stage_inputs(stage)) or stale.intersection(stage["depends"]):
+            self.made_stages.discard(stage["name"])
+            stale.add(stage["name"])
+
+def stage_params(self, stage):
+    # outputs written back onto a parameter object are not part of its key
+    exclude = [path.split(".")[-1] for path in stage["outputs"] if "." in path]
+    params = {name: canonical(getattr(self, name), exclude) for name in stage["params"]}
+
+    # custom callbacks are handed the whole bunker and may read anything on it
+    if any(callable(getattr(self, name)) for name in stage["params"]):
+        params["bunker"] = canonical(self, ("roof_object", "roof_bp", "stage_cache"))
+
+    return params
+
+def collect_outputs(self, stage):
+    outputs = {}
+    for path in stage["outputs"]:
+        target, name = _resolve_path(self, path)
+        if hasattr(target, name):
+            outputs[path] = getattr(target, name)
+    return outputs
+
+def apply_outputs(self, outputs):
+    for path, value in outputs.items():
+        target, name = _resolve_path(self, path)
+        setattr(target, name, value)
+
+def lookup_stage(self, stage):
+    '''
+    Prepare the stage and check the stage cache.
+    Returns the cache key and the cached outputs, if any.
+    '''
+    if "prepare" in stage:
+        stage["prepare"](self)
+
+    cache = self.stage_cache
+    if cache is None:
+        return None, None
+
+    try:
+        key = cache.make_key(stage["name"], stage_params(self, stage))
+    except CacheKeyError:
+        # a callback reads something without a stable key, always run it
+        return None, None
+
+    return key, cache.get(key)
+
+def execute_stage(self, stage):
+    for operation in stage["run"]:
+        operation(self)
+
+def store_stage(self, stage, key):
+    if key is not None:
+        self.stage_cache.put(key, collect_outputs(self, stage))
+
+def run_stage(self, stage):
+    key, outputs = lookup_stage(self, stage)
+
+    if outputs is not None:
+        apply_outputs(self, outputs)
+        return
+
+    execute_stage(self, stage)
+    store_stage(self, stage, key)
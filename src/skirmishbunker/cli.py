@@ -0,0 +1,259 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing.connection import wait
+
+GENERATORS = ["Bunker", "FlatRoof", "DetailedRoof", "Catwalk", "Hatch", "BlastDoor", "SplitDoor"]
+
+def read_jobs(path):
+    '''
+    One json spec per line:
+    {"name": "bunker_a", "type": "Bunker", "params": {"length": 110}, "method": "build_plate"}
+    '''
+    jobs = []
+    with open(path) as jobs_file:
+        for line_number, line in enumerate(jobs_file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            job = json.loads(line)
+            job.setdefault("name", f"job_{line_number}")
+            job.setdefault("params", {})
+            job.setdefault("method", "build")
+
+            if job.get("type") not in GENERATORS:
+                raise Exception(f"line {line_number}: unrecognized type {job.get('type')}")
+            jobs.append(job)
+
+    names = [job["name"] for job in jobs]
+    if len(names) != len(set(names)):
+        raise Exception("Job names must be unique")
+
+    return jobs
+
+def read_manifest(path):
+    entries = {}
+    if os.path.exists(path):
+        with open(path) as manifest_file:
+            for line in manifest_file:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[entry["name"]] = entry
+    return entries
+
+def build_model(job):
+    import skirmishbunker
+
+    model = getattr(skirmishbunker, job["type"])()
+    for key, value in job["params"].items():
+        if not hasattr(model, key):
+            raise Exception(f"{job['type']} has no parameter {key}")
+        setattr(model, key, value)
+
+    model.make()
+    return getattr(model, job["method"])()
+
+def build_job(job, out_dir):
+    from skirmishbunker.stlStream import stream_stl
+
+    start = time.perf_counter()
+    entry = {"name": job["name"], "type": job["type"]}
+
+    try:
+        path = os.path.join(out_dir, f"{job['name']}.stl")
+        stream_stl(build_model(job), path)
+        entry["status"] = "ok"
+        entry["file"] = os.path.basename(path)
+        entry["bytes"] = os.path.getsize(path)
+    except Exception as error:
+        entry["status"] = "error"
+        entry["error"] = f"{type(error).__name__}: {error}"
+
+    entry["seconds"] = round(time.perf_counter() - start, 3)
+    return entry
+
+def worker_main(connection, out_dir, max_jobs):
+    count = 0
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+
+        connection.send(build_job(job, out_dir))
+        count += 1
+
+        # exit so the parent starts a fresh process, contains OCC memory growth
+        if max_jobs and count >= max_jobs:
+            break
+
+    connection.close()
+
+class BatchWorker:
+    def __init__(self, out_dir, max_jobs):
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=worker_main,
+            args=(child_connection, out_dir, max_jobs),
+            daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+
+        self.max_jobs = max_jobs
+        self.jobs_done = 0
+        self.job = None
+        self.started = None
+
+    def send(self, job):
+        self.job = job
+        self.started = time.perf_counter()
+        self.connection.send(job)
+
+    def finish(self):
+        self.job = None
+        self.started = None
+        self.jobs_done += 1
+        return self.max_jobs and self.jobs_done >= self.max_jobs
+
+    def stop(self):
+        if self.process.is_alive():
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+
+def run_batch(jobs, out_dir, workers=1, timeout=None, max_jobs_per_worker=None, resume=False, log=print):
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, "manifest.jsonl")
+
+    if resume:
+        finished = read_manifest(manifest_path)
+        jobs = [
+            job for job in jobs
+            if not (
+                job["name"] in finished
+                and finished[job["name"]]["status"] == "ok"
+                and os.path.exists(os.path.join(out_dir, finished[job["name"]]["file"]))
+            )
+        ]
+
+    pending = list(jobs)
+    pool = []
+    results = []
+
+    with open(manifest_path, "a") as manifest:
+        def record(entry):
+            results.append(entry)
+            manifest.write(json.dumps(entry) + "\n")
+            manifest.flush()
+            log(f"{entry['status']:>7} {entry['name']} {entry['seconds']}s")
+
+        while pending or any(worker.job for worker in pool):
+            # keep every slot busy
+            while pending and len(pool) < workers:
+                pool.append(BatchWorker(out_dir, max_jobs_per_worker))
+            for worker in pool:
+                if pending and worker.job is None:
+                    worker.send(pending.pop(0))
+
+            busy = {worker.connection: worker for worker in pool if worker.job}
+            ready = wait(list(busy), timeout=1)
+
+            for connection in ready:
+                worker = busy[connection]
+                job = worker.job
+                try:
+                    entry = connection.recv()
+                except EOFError:
+                    entry = {
+                        "name": job["name"],
+                        "type": job["type"],
+                        "status": "error",
+                        "error": "worker exited",
+                        "seconds": round(time.perf_counter() - worker.started, 3)
+                    }
+                    worker.finish()
+                    worker.kill()
+                    pool.remove(worker)
+                    record(entry)
+                    continue
+
+                record(entry)
+                if worker.finish():
+                    worker.stop()
+                    pool.remove(worker)
+
+            if timeout:
+                now = time.perf_counter()
+                for worker in list(pool):
+                    if worker.job and now - worker.started > timeout:
+                        record({
+                            "name": worker.job["name"],
+                            "type": worker.job["type"],
+                            "status": "timeout",
+                            "seconds": round(now - worker.started, 3)
+                        })
+                        worker.kill()
+                        pool.remove(worker)
+
+        for worker in pool:
+            worker.stop()
+
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="skirmishbunker")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="build a json lines file of specs to STL")
+    batch.add_argument("jobs", help="json lines file, one spec per line")
+    batch.add_argument("-o", "--out", default="stl", help="output directory (default: stl)")
+    batch.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    batch.add_argument("--timeout", type=float, default=None, help="seconds before a job is killed")
+    batch.add_argument("--max-jobs-per-worker", type=int, default=None, help="recycle a worker after this many jobs")
+    batch.add_argument("--resume", action="store_true", help="skip jobs already built according to the manifest")
+
+    args = parser.parse_args(argv)
+
+    jobs = read_jobs(args.jobs)
+    results = run_batch(
+        jobs,
+        args.out,
+        workers=max(1, args.workers),
+        timeout=args.timeout,
+        max_jobs_per_worker=args.max_jobs_per_worker,
+        resume=args.resume
+    )
+
+    failed = [entry for entry in results if entry["status"] != "ok"]
+    print(f"{len(results) - len(failed)} built, {len(failed)} failed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
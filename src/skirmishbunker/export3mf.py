@@ -0,0 +1,127 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import zipfile
+from xml.sax.saxutils import quoteattr
+from .fastExport import export_profile, part_meshes
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+"""
+
+RELATIONSHIPS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+"""
+
+MODEL_START = """<?xml version="1.0" encoding="UTF-8"?>
+<model unit="millimeter" xml:lang="en-US" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">
+<resources>
+"""
+
+def indexed_mesh(corners, decimals=5):
+    '''
+    Shared vertices, shape (vertices, 3), and the vertex indices of each triangle, shape (triangles, 3).
+    Triangles that collapse once their corners are merged are dropped, 3MF does not allow them.
+    '''
+    # + 0.0 folds -0.0 into 0.0 so equal points have equal bytes
+    rounded = np.ascontiguousarray(np.round(corners.reshape(-1, 3), decimals) + 0.0)
+    rows = rounded.view(np.dtype((np.void, rounded.dtype.itemsize * 3))).ravel()
+    _, first, indices = np.unique(rows, return_index=True, return_inverse=True)
+    vertices = rounded[first]
+    triangles = indices.reshape(-1, 3)
+    keep = (
+        (triangles[:, 0] != triangles[:, 1])
+        & (triangles[:, 1] != triangles[:, 2])
+        & (triangles[:, 0] != triangles[:, 2])
+    )
+    return vertices, triangles[keep]
+
+def transform_attribute(matrix):
+    '''
+    3MF transforms are row vector matrices, the transpose of the rotation then the translation.
+    '''
+    values = np.concatenate([matrix[:3, :3].T.ravel(), matrix[:3, 3]])
+    return " ".join(f"{value:.6g}" for value in values)
+
+def write_rows(stream, template, rows, chunk=65536):
+    '''
+    Formats rows a chunk at a time with one % operation each, writing row by row is far slower.
+    '''
+    for index in range(0, len(rows), chunk):
+        block = rows[index:index + chunk]
+        stream.write(((template * len(block)) % tuple(block.ravel().tolist())).encode())
+
+def write_mesh_object(stream, object_id, name, corners):
+    vertices, triangles = indexed_mesh(corners)
+
+    stream.write(f'<object id="{object_id}" type="model" name={quoteattr(name)}>\n<mesh>\n<vertices>\n'.encode())
+    write_rows(stream, '<vertex x="%.5f" y="%.5f" z="%.5f"/>\n', vertices)
+    stream.write(b"</vertices>\n<triangles>\n")
+    write_rows(stream, '<triangle v1="%d" v2="%d" v3="%d"/>\n', triangles)
+    stream.write(b"</triangles>\n</mesh>\n</object>\n")
+    return len(vertices), len(triangles)
+
+def export_3mf(parts, target, tolerance=0.1, angular_tolerance=0.1, profile=None):
+    '''
+    3MF of parts, see fastExport.part_meshes. Every distinct mesh is written once
+    as an object, each part is one build item whose components place those
+    objects, so repeated tiles, doors and panels are stored once.
+    The model is streamed into the zip as it is meshed, target is a path or file-like object.
+    '''
+    profile = export_profile(tolerance, angular_tolerance, profile)
+    stats = {"objects": 0, "components": 0, "vertices": 0, "triangles": 0, "placed_triangles": 0}
+    assemblies = {}
+    next_id = 1
+
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", CONTENT_TYPES)
+        package.writestr("_rels/.rels", RELATIONSHIPS)
+
+        with package.open("3D/3dmodel.model", "w") as stream:
+            stream.write(MODEL_START.encode())
+
+            for name, structural, corners, matrices in part_meshes(parts, profile):
+                part_name = name or "part"
+                object_name = f"{part_name}_{'body' if structural else 'component'}_{next_id}"
+                vertices, triangles = write_mesh_object(stream, next_id, object_name, corners)
+
+                assemblies.setdefault(part_name, []).extend((next_id, matrix) for matrix in matrices)
+                stats["objects"] += 1
+                stats["components"] += len(matrices)
+                stats["vertices"] += vertices
+                stats["triangles"] += triangles
+                stats["placed_triangles"] += triangles * len(matrices)
+                next_id += 1
+
+            items = []
+            for part_name, components in assemblies.items():
+                stream.write(f'<object id="{next_id}" type="model" name={quoteattr(part_name)}>\n<components>\n'.encode())
+                for object_id, matrix in components:
+                    stream.write(f'<component objectid="{object_id}" transform="{transform_attribute(matrix)}"/>\n'.encode())
+                stream.write(b"</components>\n</object>\n")
+                items.append(next_id)
+                next_id += 1
+
+            stream.write(b"</resources>\n<build>\n")
+            for object_id in items:
+                stream.write(f'<item objectid="{object_id}"/>\n'.encode())
+            stream.write(b"</build>\n</model>\n")
+
+    return stats
@@ -0,0 +1,162 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import numpy as np
+from .fastExport import export_profile, part_meshes
+from .export3mf import indexed_mesh
+
+GLB_MAGIC = 0x46546C67
+JSON_CHUNK = 0x4E4F534A
+BIN_CHUNK = 0x004E4942
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+FLOAT = 5126
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+
+# glTF is y up and in meters, the model is z up and in millimeters
+ROOT_ROTATION = [-0.5 ** 0.5, 0.0, 0.0, 0.5 ** 0.5]
+ROOT_SCALE = [0.001, 0.001, 0.001]
+
+class GlbBuffer:
+    '''
+    The binary chunk of a GLB, arrays are appended as buffer views and accessors.
+    '''
+    def __init__(self):
+        self.blobs = []
+        self.length = 0
+        self.buffer_views = []
+        self.accessors = []
+
+    def add(self, array, target, accessor):
+        data = np.ascontiguousarray(array).tobytes()
+        self.buffer_views.append({"buffer": 0, "byteOffset": self.length, "byteLength": len(data), "target": target})
+        self.blobs.append(data)
+        self.length += len(data)
+
+        padding = -self.length % 4
+        if padding:
+            self.blobs.append(b"\0" * padding)
+            self.length += padding
+
+        accessor["bufferView"] = len(self.buffer_views) - 1
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+    def add_mesh(self, vertices, triangles):
+        vertices = vertices.astype(np.float32)
+        position = self.add(vertices, ARRAY_BUFFER, {
+            "componentType": FLOAT,
+            "count": len(vertices),
+            "type": "VEC3",
+            "min": vertices.min(axis=0).tolist(),
+            "max": vertices.max(axis=0).tolist()
+        })
+
+        small = len(vertices) < 65536
+        indices = self.add(triangles.astype(np.uint16 if small else np.uint32), ELEMENT_ARRAY_BUFFER, {
+            "componentType": UNSIGNED_SHORT if small else UNSIGNED_INT,
+            "count": triangles.size,
+            "type": "SCALAR"
+        })
+        return {"attributes": {"POSITION": position}, "indices": indices, "mode": 4}
+
+def node_matrix(matrix):
+    '''
+    glTF matrices are column major, identity placements are left out.
+    '''
+    if np.allclose(matrix, np.identity(4)):
+        return {}
+    return {"matrix": matrix.T.ravel().tolist()}
+
+def write_chunk(stream, chunk_type, blobs, length):
+    stream.write(np.array([length, chunk_type], dtype="<u4").tobytes())
+    for blob in blobs:
+        stream.write(blob)
+
+def export_glb(parts, target, tolerance=0.1, angular_tolerance=0.1, profile=None):
+    '''
+    Binary glTF of parts, see fastExport.part_meshes, for previews in a web viewer.
+    Every distinct mesh is stored once, each placement of it is a node under a group node
+    named after its part, so repeated tiles, doors and panels are instanced.
+    Normals are left out, viewers shade flat without them. target is a path or binary file-like object.
+    '''
+    profile = export_profile(tolerance, angular_tolerance, profile)
+    stats = {"meshes": 0, "nodes": 0, "vertices": 0, "triangles": 0, "placed_triangles": 0}
+    buffer = GlbBuffer()
+    meshes = []
+    nodes = [{"name": "skirmishbunker", "rotation": ROOT_ROTATION, "scale": ROOT_SCALE, "children": []}]
+    groups = {}
+
+    for name, structural, corners, matrices in part_meshes(parts, profile):
+        vertices, triangles = indexed_mesh(corners)
+        if not len(triangles):
+            continue
+
+        group_name = name or "part"
+        if group_name not in groups:
+            groups[group_name] = {"name": group_name, "children": []}
+            nodes[0]["children"].append(len(nodes))
+            nodes.append(groups[group_name])
+
+        mesh_index = len(meshes)
+        meshes.append({
+            "name": f"{group_name}_{'body' if structural else 'component'}_{mesh_index}",
+            "primitives": [buffer.add_mesh(vertices, triangles)]
+        })
+
+        for matrix in matrices:
+            groups[group_name]["children"].append(len(nodes))
+            nodes.append({"mesh": mesh_index, **node_matrix(matrix)})
+
+        stats["meshes"] += 1
+        stats["nodes"] += len(matrices)
+        stats["vertices"] += len(vertices)
+        stats["triangles"] += len(triangles)
+        stats["placed_triangles"] += len(triangles) * len(matrices)
+
+    document = {
+        "asset": {"version": "2.0", "generator": "skirmishbunker"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": nodes,
+        "meshes": meshes,
+        "accessors": buffer.accessors,
+        "bufferViews": buffer.buffer_views,
+        "buffers": [{"byteLength": buffer.length}]
+    }
+    if not meshes:
+        # an empty buffer is not allowed
+        for key in ("meshes", "accessors", "bufferViews", "buffers"):
+            del document[key]
+
+    content = json.dumps(document, separators=(",", ":")).encode()
+    content += b" " * (-len(content) % 4)
+    length = 12 + 8 + len(content) + (8 + buffer.length if meshes else 0)
+
+    owns_file = not hasattr(target, "write")
+    stream = open(target, "wb") if owns_file else target
+    try:
+        stream.write(np.array([GLB_MAGIC, 2, length], dtype="<u4").tobytes())
+        write_chunk(stream, JSON_CHUNK, [content], len(content))
+        if meshes:
+            write_chunk(stream, BIN_CHUNK, buffer.blobs, buffer.length)
+    finally:
+        if owns_file:
+            stream.close()
+
+    stats["bytes"] = length
+    return stats
@@ -0,0 +1,66 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import time
+from OCP.ShapeUpgrade import ShapeUpgrade_UnifySameDomain
+
+def face_edge_counts(vals):
+    faces = 0
+    edges = 0
+    for val in vals:
+        if isinstance(val, cq.Shape):
+            faces += len(val.Faces())
+            edges += len(val.Edges())
+    return faces, edges
+
+def merge_shape(shape, linear_tolerance=None, angular_tolerance=None):
+    '''
+    shape with faces and edges that lie on the same surface or curve merged into one.
+    '''
+    unify = ShapeUpgrade_UnifySameDomain(shape.wrapped, True, True, True)
+    unify.AllowInternalEdges(False)
+    if linear_tolerance is not None:
+        unify.SetLinearTolerance(linear_tolerance)
+    if angular_tolerance is not None:
+        unify.SetAngularTolerance(angular_tolerance)
+    unify.Build()
+    return cq.Shape.cast(unify.Shape())
+
+def merge_faces(scene, stage=None, stats=None, linear_tolerance=None, angular_tolerance=None):
+    '''
+    Workplane of scene with every shape run through merge_shape.
+    When stats is a list an entry with the face and edge counts before and after is appended.
+    '''
+    start = time.perf_counter()
+    vals = scene.vals() if isinstance(scene, cq.Workplane) else list(scene)
+    before = face_edge_counts(vals)
+
+    merged = [
+        merge_shape(val, linear_tolerance, angular_tolerance) if isinstance(val, cq.Shape) else val
+        for val in vals
+    ]
+
+    if stats is not None:
+        after = face_edge_counts(merged)
+        stats.append({
+            "stage": stage,
+            "faces_before": before[0],
+            "faces_after": after[0],
+            "edges_before": before[1],
+            "edges_after": after[1],
+            "seconds": round(time.perf_counter() - start, 4)
+        })
+
+    return cq.Workplane("XY").newObject(merged)
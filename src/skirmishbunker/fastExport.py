@@ -0,0 +1,232 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import numpy as np
+from OCP.TopLoc import TopLoc_Location
+from .tileCulling import bounds_overlap, Bounds
+from .fuseShapes import fuse_shapes
+from .stlStream import mesh_corners, StlWriter
+from .ToleranceProfile import ToleranceProfile, tolerance_profile
+
+def shape_solids(shapes):
+    solids = []
+    for shape in shapes:
+        if shape is None:
+            continue
+        vals = shape.vals() if isinstance(shape, cq.Workplane) else [shape]
+        for val in vals:
+            if isinstance(val, cq.Shape):
+                solids.extend(val.Solids())
+    return solids
+
+def location_matrix(shape):
+    trsf = shape.wrapped.Location().Transformation()
+    matrix = np.identity(4)
+    for row in range(3):
+        for column in range(4):
+            matrix[row, column] = trsf.Value(row + 1, column + 1)
+    return matrix
+
+def base_shape(shape):
+    '''
+    The shape with its location stripped, shared by every instance of it.
+    '''
+    return cq.Shape.cast(shape.wrapped.Located(TopLoc_Location()))
+
+def transformed_bounds(bounds, matrix):
+    corners = np.array([
+        (x, y, z)
+        for x in (bounds.xmin, bounds.xmax)
+        for y in (bounds.ymin, bounds.ymax)
+        for z in (bounds.zmin, bounds.zmax)
+    ])
+    moved = corners @ matrix[:3, :3].T + matrix[:3, 3]
+    low = moved.min(axis=0)
+    high = moved.max(axis=0)
+    return Bounds(low[0], high[0], low[1], high[1], low[2], high[2])
+
+class InstanceBounds:
+    '''
+    Bounding boxes of located solids, measured once per shared shape.
+    '''
+    def __init__(self):
+        self.bases = {}
+
+    def __call__(self, solid):
+        key = (solid.wrapped.TShape(), solid.wrapped.Orientation())
+        if key not in self.bases:
+            self.bases[key] = base_shape(solid).BoundingBox()
+        return transformed_bounds(self.bases[key], location_matrix(solid))
+
+def split_operations(operations, bounds=None):
+    '''
+    operations are the (operation, shapes) steps of a build, operation is "union", "touch", "cut" or "add".
+    "touch" unions shapes that only touch and is treated as "union" here.
+    Solids of union / add steps that no later cut reaches are pulled out as decorations,
+    the remaining steps still need the OCC booleans.
+    '''
+    bounds = bounds or InstanceBounds()
+    later_cuts = []
+    structural = []
+    decorations = []
+
+    for operation, shapes in reversed(operations):
+        solids = shape_solids(shapes)
+
+        if operation == "cut":
+            structural.append((operation, solids))
+            later_cuts.extend(bounds(solid) for solid in solids)
+            continue
+
+        fused = []
+        for solid in solids:
+            solid_bounds = bounds(solid)
+            if any(bounds_overlap(solid_bounds, cut) for cut in later_cuts):
+                fused.append(solid)
+            else:
+                decorations.append(solid)
+        structural.append(("union", fused))
+
+    structural.reverse()
+    return structural, decorations
+
+def component_parts(part, components, bounds=None):
+    '''
+    part, an (operations, translate, name) entry of part_meshes, split into one part per
+    named component. components is a list of (name, shape), solids of shape that no later
+    cut reaches move to a part of that name, everything else stays in part.
+    '''
+    operations, translate, name = part
+    structural, decorations = split_operations(operations, bounds)
+
+    labels = {}
+    for component, shape in components:
+        if shape:
+            labels.update((solid, component) for solid in shape_solids([shape]))
+
+    # Shape equality is same TShape and location, so culled copies still match
+    grouped = {}
+    remaining = []
+    for solid in decorations:
+        if solid in labels:
+            grouped.setdefault(labels[solid], []).append(solid)
+        else:
+            remaining.append(solid)
+
+    parts = [(structural + [("add", remaining)], translate, name)]
+    parts.extend(([("add", solids)], translate, component) for component, solids in grouped.items())
+    return parts
+
+def run_operations(operations):
+    '''
+    Applies the (operation, solids) steps, "add" solids are placed without a boolean.
+    Solids are handed to OCC as separate tools rather than one compound,
+    a compound of overlapping solids is not a valid boolean input.
+    '''
+    scene = None
+    for operation, solids in operations:
+        if not solids:
+            continue
+
+        if operation == "add":
+            scene = (scene or cq.Workplane("XY")).add(solids)
+            continue
+
+        if scene is None:
+            if operation == "union":
+                scene = fuse_shapes(solids)
+            continue
+
+        tool = cq.Workplane("XY").add(solids)
+        if operation == "cut":
+            scene = scene.cut(tool)
+        else:
+            scene = scene.union(tool)
+    return scene
+
+def replicate(corners, matrices):
+    '''
+    The mesh corners placed by every matrix, shape (instances * triangles, 3, 3).
+    '''
+    placed = np.einsum("tcj,kij->ktci", corners, matrices[:, :3, :3]) + matrices[:, None, None, :3, 3]
+    return placed.reshape(-1, 3, 3)
+
+def export_profile(tolerance, angular_tolerance, profile):
+    if profile is None:
+        profile = ToleranceProfile(
+            planar=(tolerance, angular_tolerance),
+            curved=(tolerance, angular_tolerance)
+        )
+    return tolerance_profile(profile)
+
+def part_meshes(parts, profile):
+    '''
+    Yields (name, structural, corners, matrices) for parts, a list of (operations, translate)
+    or (operations, translate, name). corners is a mesh in its own frame, shape (triangles, 3, 3),
+    matrices a (placements, 4, 4) array of where it goes.
+    Structural steps are fused by OCC and meshed as one, each distinct decoration is meshed once
+    and placed wherever it is used.
+    '''
+    bounds = InstanceBounds()
+    for part in parts:
+        operations, translate = part[:2]
+        name = part[2] if len(part) > 2 else None
+        part_profile = profile.for_component(name)
+        structural, decorations = split_operations(operations, bounds)
+
+        offset = np.identity(4)
+        offset[:3, 3] = translate
+
+        scene = run_operations(structural)
+        if scene is not None:
+            for val in scene.vals():
+                yield name, True, mesh_corners(val, *part_profile.mesh(val)), offset[None]
+
+        groups = {}
+        for solid in decorations:
+            key = (solid.wrapped.TShape(), solid.wrapped.Orientation())
+            if key not in groups:
+                groups[key] = (base_shape(solid), [])
+            groups[key][1].append(location_matrix(solid))
+
+        for shape, matrices in groups.values():
+            matrices = np.array(matrices)
+            matrices[:, :3, 3] += offset[:3, 3]
+            yield name, False, mesh_corners(shape, *part_profile.mesh(shape)), matrices
+
+def fast_export_stl(parts, path, tolerance=0.1, angular_tolerance=0.1, profile=None):
+    '''
+    Binary STL of parts, see part_meshes, profile is a ToleranceProfile or profile name
+    and parts are matched to its overrides by name.
+    Each distinct decoration is meshed once and its triangles copied to every placement,
+    overlapping the body as a separate shell, which slicers accept.
+    '''
+    profile = export_profile(tolerance, angular_tolerance, profile)
+    stats = {"structural_triangles": 0, "decoration_triangles": 0, "decorations": 0, "unique_decorations": 0}
+
+    with StlWriter(path, b"skirmishbunker fast export") as writer:
+        for name, structural, corners, matrices in part_meshes(parts, profile):
+            corners = replicate(corners, matrices)
+            writer.write(corners)
+
+            if structural:
+                stats["structural_triangles"] += len(corners)
+            else:
+                stats["decoration_triangles"] += len(corners)
+                stats["decorations"] += len(matrices)
+                stats["unique_decorations"] += 1
+
+    stats["triangles"] = writer.count
+    return stats
@@ -0,0 +1,89 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+from OCP.BRepAlgoAPI import BRepAlgoAPI_Fuse
+from .PerformanceConfig import performance_config
+from .tileCulling import bounds_overlap
+
+def shape_vals(shapes):
+    vals = []
+    for shape in shapes:
+        if shape is None:
+            continue
+        for val in shape.vals() if isinstance(shape, cq.Workplane) else [shape]:
+            if isinstance(val, cq.Shape):
+                vals.append(val)
+    return vals
+
+def bounds_disjoint(vals):
+    bounds = [val.BoundingBox() for val in vals]
+    for i in range(len(bounds)):
+        for j in range(i + 1, len(bounds)):
+            if bounds_overlap(bounds[i], bounds[j]):
+                return False
+    return True
+
+def fuse_shapes(shapes, clean=True):
+    '''
+    Fuses a list of Workplanes / Shapes into one Workplane.
+
+    Shapes with disjoint bounds go through a single multi argument fuse.
+    Otherwise they are fused pairwise as a balanced tree, so no step
+    re-processes everything fused before it like a chain of .union() does.
+    '''
+    vals = shape_vals(shapes)
+    if not vals:
+        return cq.Workplane("XY")
+
+    if len(vals) == 1 or bounds_disjoint(vals):
+        fused = vals[0].fuse(*vals[1:]) if len(vals) > 1 else vals[0]
+        if clean:
+            fused = fused.clean()
+        return cq.Workplane("XY").add(fused)
+
+    while len(vals) > 1:
+        paired = []
+        for i in range(0, len(vals) - 1, 2):
+            fused = vals[i].fuse(vals[i + 1])
+            if clean:
+                fused = fused.clean()
+            paired.append(fused)
+
+        if len(vals) % 2:
+            paired.append(vals[-1])
+        vals = paired
+
+    return cq.Workplane("XY").add(vals[0])
+
+def fuse_touching(shape, tools, clean=True):
+    '''
+    Fuses tools that only touch shape, like gridded tiles sitting on a roof,
+    with performance_config's fuzzy and glue options. Returns a Workplane.
+    Glue is applied to every tool without checking, OCC gives wrong results for
+    overlapping ones. Callers pass only tools that touch shape and each other,
+    anything that overlaps goes through .union() instead.
+    '''
+    # separate solids like Workplane.union, a compound is not a valid boolean argument
+    vals = [solid for val in shape_vals([shape]) for solid in val.Solids()]
+    tool_vals = [solid for val in shape_vals([tools]) for solid in val.Solids()]
+    if not vals or not tool_vals:
+        return cq.Workplane("XY").add(vals or tool_vals)
+
+    op = BRepAlgoAPI_Fuse()
+    performance_config.apply(op)
+    fused = vals[0]._bool_op(vals, tool_vals, op, performance_config.parallel_boolean)
+    if clean:
+        fused = fused.clean()
+    return cq.Workplane("XY").add(fused)
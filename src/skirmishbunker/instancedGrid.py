@@ -0,0 +1,56 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+
+def grid_locations(dim, odd_col_push=[0,0], columns=5, rows=5, translate=(0,0,0)):
+    '''
+    The cell centers grid.make_grid would place the part at.
+    '''
+    length = dim[1] * columns
+    width = dim[0] * rows
+
+    locations = []
+    for row_i in range(rows):
+        row_offset = dim[0] * row_i
+        for col_i in range(columns):
+            col_offset = dim[1] * col_i
+
+            col_push_x = 0
+            col_push_y = 0
+            if col_i % 2 == 1:
+                col_push_x = odd_col_push[0]
+                col_push_y = odd_col_push[1]
+
+            locations.append(cq.Vector(
+                row_offset + col_push_x + dim[0] / 2 - width / 2 + translate[0],
+                col_offset + col_push_y + dim[1] / 2 - length / 2 + translate[1],
+                translate[2]
+            ))
+    return locations
+
+def instances(part, locations):
+    shapes = part.vals()
+    return [shape.moved(cq.Location(location)) for location in locations for shape in shapes]
+
+def make_instanced_grid(part, dim, odd_col_push=[0,0], columns=5, rows=5, translate=(0,0,0)):
+    '''
+    Same layout as cadqueryhelper grid.make_grid, but every cell is a located
+    instance of the part (shared TShape) rather than a copy of it.
+
+    Workplane.translate copies every cell, so the grid is moved
+    through the translate argument instead.
+    '''
+    locations = grid_locations(dim, odd_col_push, columns, rows, translate)
+    return cq.Workplane("XY").add(cq.Compound.makeCompound(instances(part, locations)))
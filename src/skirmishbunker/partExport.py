@@ -0,0 +1,132 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from .fastExport import shape_solids, run_operations
+from .PerformanceConfig import performance_config, configure_worker
+from .stlStream import stream_stl
+from .ToleranceProfile import tolerance_profile
+
+def operations_without(operations, removed):
+    '''
+    operations with the shapes in removed taken out, compared by identity.
+    '''
+    return [
+        (operation, [shape for shape in shapes if not any(shape is other for other in removed)])
+        for operation, shapes in operations
+    ]
+
+def operations_to_bytes(operations):
+    steps = []
+    for operation, shapes in operations:
+        solids = shape_solids(shapes)
+        if not solids:
+            continue
+        stream = BytesIO()
+        cq.Compound.makeCompound(solids).exportBrep(stream)
+        steps.append((operation, stream.getvalue()))
+    return steps
+
+def operations_from_bytes(steps):
+    return [
+        (operation, cq.Shape.importBrep(BytesIO(data)).Solids())
+        for operation, data in steps
+    ]
+
+def export_part(name, steps, translate, path, tolerance, angular_tolerance, profile):
+    '''
+    Worker entry point, runs one part's booleans and streams it to path as STL.
+    '''
+    start = time.perf_counter()
+    scene = run_operations(operations_from_bytes(steps))
+    build_time = time.perf_counter() - start
+
+    entry = {"name": name, "file": os.path.basename(path), "pid": os.getpid()}
+    if scene is None:
+        entry["status"] = "empty"
+        return entry
+
+    location = cq.Location(cq.Vector(*translate))
+    scene = [val.moved(location) for val in scene.vals()]
+
+    start = time.perf_counter()
+    stats = stream_stl(scene, path, tolerance, angular_tolerance, profile=profile)
+    entry.update({
+        "status": "ok",
+        "bytes": os.path.getsize(path),
+        "triangles": stats["triangles"],
+        "build_seconds": round(build_time, 3),
+        "mesh_seconds": round(time.perf_counter() - start, 3)
+    })
+    return entry
+
+def make_executor(executor, workers):
+    if isinstance(executor, Executor):
+        return executor, False
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers=workers), True
+    if executor == "process":
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=configure_worker,
+            initargs=(performance_config.settings(),)
+        ), True
+    if executor == "serial":
+        return None, False
+    raise Exception(f"Unrecognized executor {executor}")
+
+def export_part_files(parts, out_dir, tolerance=0.1, angular_tolerance=0.1, profile=None, executor="process", workers=None):
+    '''
+    Writes each of parts, a list of (name, operations, translate), to out_dir/<name>.stl,
+    one worker per part, and a manifest.json listing every file's size and timings.
+    Shapes reach the workers as BREP, so executor can be "process", "thread", "serial"
+    or a concurrent.futures Executor.
+    '''
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    if profile is not None:
+        profile = tolerance_profile(profile)
+
+    jobs = []
+    for name, operations, translate in parts:
+        path = os.path.join(out_dir, f"{name}.stl")
+        part_profile = profile.for_component(name) if profile else None
+        jobs.append((name, operations_to_bytes(operations), tuple(translate), path, tolerance, angular_tolerance, part_profile))
+    serialize_time = time.perf_counter() - start
+
+    pool, owned = make_executor(executor, workers or len(jobs) or None)
+    try:
+        if pool is None:
+            entries = [export_part(*job) for job in jobs]
+        else:
+            futures = [pool.submit(export_part, *job) for job in jobs]
+            entries = [future.result() for future in futures]
+    finally:
+        if owned:
+            pool.shutdown()
+
+    manifest = {
+        "parts": entries,
+        "serialize_seconds": round(serialize_time, 3),
+        "total_seconds": round(time.perf_counter() - start, 3)
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    return manifest
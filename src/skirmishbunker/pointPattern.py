@@ -0,0 +1,63 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import numpy as np
+
+def corner_points(length, width, inset=0, radius=0):
+    '''
+    (4, 2) array of the pip / hole centers in the corners of a length x width footprint,
+    each inset + radius in from the edges.
+    Ordered +x+y, -x+y, -x-y, +x-y.
+    '''
+    x = length / 2 - inset - radius
+    y = width / 2 - inset - radius
+    return np.array([
+        [x, y],
+        [-1 * x, y],
+        [-1 * x, -1 * y],
+        [x, -1 * y]
+    ], dtype=np.float64)
+
+def make_cylinders(points, height, radius, z_translate=0):
+    '''
+    One cylinder per point as a single compound, every cylinder
+    is a located instance of the same solid.
+    '''
+    cylinders = (
+        cq.Workplane("XY")
+        .workplane(offset=z_translate)
+        .pushPoints([tuple(point) for point in points])
+        .cylinder(height, radius, combine=False)
+    )
+    return cq.Workplane("XY").add(cq.Compound.makeCompound(cylinders.vals()))
+
+def pattern_fit(pins, pin_radius, holes, hole_radius):
+    '''
+    How well the pins of one pattern sit in the holes of another, matched in order.
+    offset is the furthest a pin center is from its hole center,
+    clearance the smallest gap left between a pin and its hole wall.
+    '''
+    pins = np.asarray(pins, dtype=np.float64)
+    holes = np.asarray(holes, dtype=np.float64)
+    if pins.shape != holes.shape:
+        raise Exception("pin and hole patterns have different point counts")
+
+    offsets = np.linalg.norm(pins - holes, axis=1)
+    clearances = hole_radius - pin_radius - offsets
+    return {
+        "offset": float(offsets.max()),
+        "clearance": float(clearances.min()),
+        "fits": bool((clearances >= -1e-9).all())
+    }
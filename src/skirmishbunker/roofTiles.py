@@ -0,0 +1,63 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+from .ComponentLibrary import component_library
+
+def make_slotted_tile(tile_size, tile_height, slots, slot_depth=None):
+    '''
+    Square tile with diagonal slots, slots are (length, diameter, offset)
+    with offset measured along the diagonal the way the slot2D cuts were translated.
+    slot_depth None cuts the slots all the way through,
+    which is drawn as one sketch and extruded once.
+    '''
+    through = slot_depth is None or slot_depth >= tile_height
+
+    sketch = cq.Sketch()
+    if through:
+        sketch = sketch.rect(tile_size, tile_size)
+
+    mode = "s" if through else "a"
+    for length, diameter, offset in slots:
+        # slot2D length is end to end, Sketch.slot width is between the arc centers
+        sketch = (
+            sketch.push([(offset, offset)])
+            .slot(length - diameter, diameter, angle=-45, mode=mode)
+            .reset()
+        )
+
+    if through:
+        return (
+            cq.Workplane("XY", origin=(0, 0, -tile_height / 2))
+            .placeSketch(sketch)
+            .extrude(tile_height)
+        )
+
+    tile = cq.Workplane("XY").box(tile_size, tile_size, tile_height)
+    cut_slots = (
+        cq.Workplane("XY", origin=(0, 0, tile_height / 2 - slot_depth))
+        .placeSketch(sketch)
+        .extrude(slot_depth + tile_height)
+    )
+    return tile.cut(cut_slots)
+
+def slotted_tile(tile_size, tile_height, slots, slot_depth=None):
+    '''
+    make_slotted_tile memoized in the component library.
+    '''
+    return component_library.get(
+        "SlottedTile",
+        [tile_size, tile_height, [list(slot) for slot in slots], slot_depth],
+        lambda: make_slotted_tile(tile_size, tile_height, slots, slot_depth)
+    )
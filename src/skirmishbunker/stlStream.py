@@ -0,0 +1,207 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import numpy as np
+import os
+import time
+from OCP.BRep import BRep_Tool
+from OCP.BRepMesh import BRepMesh_IncrementalMesh
+from OCP.TopAbs import TopAbs_FACE, TopAbs_REVERSED
+from OCP.TopExp import TopExp_Explorer
+from OCP.TopLoc import TopLoc_Location
+from OCP.TopoDS import TopoDS
+from .PerformanceConfig import performance_config
+from .ToleranceProfile import ToleranceProfile, tolerance_profile
+
+STL_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attribute", "<u2")
+])
+
+def location_transform(location):
+    '''
+    Rotation and translation of a TopLoc_Location as numpy arrays.
+    '''
+    trsf = location.Transformation()
+    matrix = np.array([[trsf.Value(row, column) for column in range(1, 5)] for row in range(1, 4)])
+    return matrix[:, :3], matrix[:, 3]
+
+def face_corners(face):
+    '''
+    Triangle corners of an already meshed face, None if it has no triangulation.
+    '''
+    location = TopLoc_Location()
+    triangulation = BRep_Tool.Triangulation_s(face, location)
+    if triangulation is None or triangulation.NbTriangles() == 0:
+        return None
+
+    node = triangulation.Node
+    triangle = triangulation.Triangle
+    nodes = np.array([node(index).Coord() for index in range(1, triangulation.NbNodes() + 1)])
+    triangles = np.array([triangle(index).Get() for index in range(1, triangulation.NbTriangles() + 1)]) - 1
+
+    if face.Orientation() == TopAbs_REVERSED:
+        triangles = triangles[:, ::-1]
+
+    if not location.IsIdentity():
+        rotation, translation = location_transform(location)
+        nodes = nodes @ rotation.T + translation
+
+    return nodes[triangles]
+
+def faces_corners(faces):
+    '''
+    Triangle corners of already meshed faces, shape (triangles, 3, 3).
+    '''
+    corners = [corners for corners in map(face_corners, faces) if corners is not None]
+    if not corners:
+        return np.zeros((0, 3, 3))
+    return np.concatenate(corners)
+
+def mesh_corners(shape, tolerance, angular_tolerance):
+    '''
+    Triangle corners, shape (triangles, 3, 3), meshed the way cq.exporters.export meshes.
+    The face triangulations are read straight into numpy, nothing goes through a file.
+    '''
+    BRepMesh_IncrementalMesh(shape.wrapped, tolerance, True, angular_tolerance, performance_config.parallel_mesh)
+
+    faces = []
+    explorer = TopExp_Explorer(shape.wrapped, TopAbs_FACE)
+    while explorer.More():
+        faces.append(TopoDS.Face_s(explorer.Current()))
+        explorer.Next()
+    return faces_corners(faces)
+
+def stl_records(corners):
+    records = np.zeros(len(corners), dtype=STL_DTYPE)
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1
+    records["normal"] = normals / lengths[:, None]
+    records["vertices"] = corners
+    return records
+
+class StlWriter:
+    '''
+    Binary STL written as the triangles arrive. The header goes out with a zero
+    count, close() seeks back and patches in the real one, so target has to be seekable.
+    target is a path or a binary file-like object, which is left open.
+    Leaving the with block on an exception skips the patch and removes a file opened from a path.
+    '''
+    def __init__(self, target, header=b"skirmishbunker"):
+        self.owns_file = not hasattr(target, "write")
+        self.path = None if not self.owns_file else target
+        self.file = open(target, "wb") if self.owns_file else target
+
+        if not self.file.seekable():
+            if self.owns_file:
+                self.file.close()
+            raise Exception("StlWriter needs a seekable file")
+
+        self.start = self.file.tell()
+        self.count = 0
+        self.largest_chunk = 0
+        self.file.write(header[:80].ljust(80, b" "))
+        self.file.write(np.array([0], dtype="<u4").tobytes())
+
+    def write(self, corners):
+        if len(corners) == 0:
+            return
+        self.file.write(stl_records(corners).tobytes())
+        self.count += len(corners)
+        self.largest_chunk = max(self.largest_chunk, len(corners))
+
+    def close(self):
+        end = self.file.tell()
+        self.file.seek(self.start + 80)
+        self.file.write(np.array([self.count], dtype="<u4").tobytes())
+        self.file.seek(end)
+
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self.owns_file:
+            self.file.close()
+            os.remove(self.path)
+        return False
+
+def shape_chunks(shape, profile, max_faces=None):
+    '''
+    Meshes the solids of shape one at a time with a ToleranceProfile. Solids with more
+    than max_faces faces are meshed once and their triangles handed out max_faces faces at a time.
+    '''
+    vals = shape.vals() if isinstance(shape, cq.Workplane) else [shape]
+    for val in vals:
+        if not isinstance(val, cq.Shape):
+            continue
+
+        for solid in val.Solids() or [val]:
+            profile.mesh(solid)
+            faces = [face.wrapped for face in solid.Faces()]
+            step = max_faces or len(faces) or 1
+
+            # the profile meshed the whole solid, the chunks only read its triangulation
+            for index in range(0, len(faces), step):
+                yield faces_corners(faces[index:index + step])
+
+def named_shapes(shapes):
+    if isinstance(shapes, dict):
+        return list(shapes.items())
+    if not isinstance(shapes, (list, tuple)):
+        shapes = [shapes]
+    return [(None, shape) for shape in shapes]
+
+def stream_stl(shapes, target, tolerance=0.1, angular_tolerance=0.1, max_faces=None, profile=None):
+    '''
+    Writes shapes, a Workplane, Shape, list of them or a dict of component name to shape,
+    to target as binary STL. Only one solid, or max_faces faces of it, is held as triangles at a time.
+    profile, a ToleranceProfile or profile name, replaces tolerance / angular_tolerance
+    and applies its overrides to the named components.
+    '''
+    if profile is None:
+        profile = ToleranceProfile(
+            planar=(tolerance, angular_tolerance),
+            curved=(tolerance, angular_tolerance)
+        )
+    profile = tolerance_profile(profile)
+
+    components = {}
+    with StlWriter(target) as writer:
+        for name, shape in named_shapes(shapes):
+            if shape is None:
+                continue
+
+            start = time.perf_counter()
+            count = writer.count
+            for corners in shape_chunks(shape, profile.for_component(name), max_faces):
+                writer.write(corners)
+
+            if name is not None:
+                components[name] = {
+                    "triangles": writer.count - count,
+                    "seconds": time.perf_counter() - start
+                }
+
+    return {"triangles": writer.count, "largest_chunk": writer.largest_chunk, "components": components}
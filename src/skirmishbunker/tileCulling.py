@@ -0,0 +1,156 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+from collections import namedtuple
+from OCP.BRepClass3d import BRepClass3d_SolidClassifier
+from OCP.TopAbs import TopAbs_IN, TopAbs_ON
+from OCP.gp import gp_Pnt
+
+Bounds = namedtuple("Bounds", ["xmin", "xmax", "ymin", "ymax", "zmin", "zmax"])
+
+def box_bounds(length, width, height, center=(0,0,0)):
+    x, y, z = center
+    return Bounds(
+        x - length / 2, x + length / 2,
+        y - width / 2, y + width / 2,
+        z - height / 2, z + height / 2
+    )
+
+def moved_bounds(bounds, vector):
+    return Bounds(
+        bounds.xmin + vector.x, bounds.xmax + vector.x,
+        bounds.ymin + vector.y, bounds.ymax + vector.y,
+        bounds.zmin + vector.z, bounds.zmax + vector.z
+    )
+
+def classify_in_ring(bounds, outer, hole):
+    '''
+    "inside", "outside" or "boundary" of the box ring outer minus hole.
+    '''
+    if not bounds_overlap(bounds, outer) or bounds_within(bounds, hole):
+        return "outside"
+    if bounds_within(bounds, outer) and not bounds_overlap(bounds, hole):
+        return "inside"
+    return "boundary"
+
+def bounds_overlap(a, b):
+    return (
+        a.xmin <= b.xmax and b.xmin <= a.xmax
+        and a.ymin <= b.ymax and b.ymin <= a.ymax
+        and a.zmin <= b.zmax and b.zmin <= a.zmax
+    )
+
+def bounds_within(inner, outer):
+    return (
+        outer.xmin <= inner.xmin and inner.xmax <= outer.xmax
+        and outer.ymin <= inner.ymin and inner.ymax <= outer.ymax
+        and outer.zmin <= inner.zmin and inner.zmax <= outer.zmax
+    )
+
+def bounds_corners(bounds):
+    return [
+        gp_Pnt(x, y, z)
+        for x in (bounds.xmin, bounds.xmax)
+        for y in (bounds.ymin, bounds.ymax)
+        for z in (bounds.zmin, bounds.zmax)
+    ]
+
+def is_convex(solid, tolerance=1e-6):
+    '''
+    True for a solid bounded by planes with every vertex on the inner side of each of them.
+    '''
+    vertices = [vertex.toTuple() for vertex in solid.Vertices()]
+    for face in solid.Faces():
+        if face.geomType() != "PLANE":
+            return False
+
+        # normalAt follows the face orientation, so it points out of the solid
+        normal = face.normalAt()
+        origin = face.Center()
+        for x, y, z in vertices:
+            if (x - origin.x) * normal.x + (y - origin.y) * normal.y + (z - origin.z) * normal.z > tolerance:
+                return False
+    return True
+
+class CutVolume:
+    def __init__(self, solid):
+        self.bounds = solid.BoundingBox()
+        # corner tests only prove a tile is covered when the cut is convex
+        self.convex = is_convex(solid)
+        # loaded once, Shape.isInside builds a new classifier for every point
+        self.classifier = BRepClass3d_SolidClassifier(solid.wrapped)
+
+    def is_inside(self, point, tolerance=1e-6):
+        self.classifier.Perform(point, tolerance)
+        return self.classifier.State() in (TopAbs_IN, TopAbs_ON)
+
+    def covers(self, bounds):
+        if not self.convex or not bounds_within(bounds, self.bounds):
+            return False
+        return all(self.is_inside(corner) for corner in bounds_corners(bounds))
+
+def cull_tiles(tiles, cuts, cut_partial=True):
+    '''
+    Classifies every tile solid against the cut solids by bounding box.
+    Tiles a convex cut removes entirely are dropped, tiles touching a cut's bounds
+    are partial, the rest are untouched.
+
+    With cut_partial only the partial tiles are cut, in a single boolean, and the result
+    already has cuts applied. The caller then unions it in after its own cut, which no
+    longer needs to reach the tiles. Otherwise the remaining tiles are returned uncut.
+
+    Returns the tiles, None when every tile was dropped, and a dict of the counts
+    and the boolean calls made.
+    '''
+    cut_solids = cuts.solids().vals()
+    cut_volumes = [CutVolume(cut) for cut in cut_solids]
+
+    untouched = []
+    partial = []
+    stats = {
+        "tiles": 0, "dropped": 0, "partial": 0, "untouched": 0,
+        "non_convex_cuts": sum(1 for cut in cut_volumes if not cut.convex),
+        "booleans": 0
+    }
+
+    for tile in tiles.solids().vals():
+        stats["tiles"] += 1
+        bounds = tile.BoundingBox()
+        touching = [cut for cut in cut_volumes if bounds_overlap(bounds, cut.bounds)]
+
+        if not touching:
+            stats["untouched"] += 1
+            untouched.append(tile)
+        elif any(cut.covers(bounds) for cut in touching):
+            stats["dropped"] += 1
+        else:
+            stats["partial"] += 1
+            partial.append(tile)
+
+    if cut_partial and partial:
+        # the tiles never overlap each other, the cuts go in as separate tools
+        partial = (
+            cq.Workplane("XY")
+            .add(cq.Compound.makeCompound(partial))
+            .cut(cq.Workplane("XY").add(cut_solids))
+            .solids()
+            .vals()
+        )
+        stats["booleans"] += 1
+
+    kept = untouched + partial
+    if not kept:
+        return None, stats
+    return cq.Workplane("XY").add(cq.Compound.makeCompound(kept)), stats
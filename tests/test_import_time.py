@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+HEAVY_MODULES = ["cadquery", "OCP", "cadqueryhelper", "cqterrain", "numpy"]
+
+# seconds allowed for `import skirmishbunker`, best of IMPORT_RUNS interpreters
+IMPORT_BUDGET = 0.5
+IMPORT_RUNS = 3
+
+def run_probe(source):
+    # a fresh interpreter, nothing already in sys.modules
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC, env.get("PYTHONPATH")]))
+    output = subprocess.run(
+        [sys.executable, "-c", source],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def test_import_loads_no_heavy_modules():
+    loaded = run_probe(
+        "import json, sys\n"
+        "import skirmishbunker\n"
+        f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))\n"
+    )
+    assert loaded == []
+
+def test_import_within_budget():
+    seconds = min(
+        run_probe(
+            "import json, time\n"
+            "start = time.perf_counter()\n"
+            "import skirmishbunker\n"
+            "print(json.dumps(time.perf_counter() - start))\n"
+        )
+        for i in range(IMPORT_RUNS)
+    )
+    assert seconds < IMPORT_BUDGET
+
+def test_exports_resolve_to_classes():
+    kinds = run_probe(
+        "import json, skirmishbunker\n"
+        "from skirmishbunker import Bunker\n"
+        # Bunker imports the FlatRoof module, the export still has to be the class
+        "print(json.dumps([type(Bunker).__name__, type(skirmishbunker.FlatRoof).__name__]))\n"
+    )
+    assert kinds == ["type", "type"]
+
+def test_exports_survive_direct_submodule_imports():
+    kinds = run_probe(
+        "import json, skirmishbunker\n"
+        "from skirmishbunker.Bunker import Bunker\n"
+        "import skirmishbunker.bunkerRoof\n"
+        "from skirmishbunker import FlatRoof, DetailedRoof, Hatch, SeriesHelper\n"
+        "print(json.dumps([type(value).__name__ for value in [Bunker, FlatRoof, DetailedRoof, Hatch, SeriesHelper, skirmishbunker.Bunker]]))\n"
+    )
+    assert kinds == ["type"] * 6
@@ -0,0 +1,62 @@
+from skirmishbunker import Bunker, StageCache
+
+def window_size(bunker):
+    box = bunker.windows.val().BoundingBox()
+    return round(box.xlen, 3), round(box.ylen, 3), round(box.zlen, 3)
+
+def test_cache_with_incremental_make(tmp_path):
+    cache = StageCache(str(tmp_path))
+
+    bunker = Bunker()
+    bunker.stage_cache = cache
+    bunker.incremental_make = True
+    # the roof stage keys the whole roof object
+    bunker.render_roof = True
+    bunker.make()
+    # one entry per stage, none are skipped for lack of a key
+    assert len(cache.entries()) == len(bunker.made_stages)
+
+    # reruns the roof stage, which now keys a roof object with tracked changes
+    bunker.width = 120
+    bunker.make()
+    assert round(bunker.wedge.val().BoundingBox().ylen, 3) == 120
+
+    # a second bunker with the same parameters is served from the cache
+    other = Bunker()
+    other.stage_cache = cache
+    other.render_roof = True
+    other.width = 120
+    other.make()
+    assert round(other.wedge.val().BoundingBox().ylen, 3) == 120
+
+def test_reenabled_stage_picks_up_changes():
+    bunker = Bunker()
+    bunker.incremental_make = True
+    bunker.render_windows = True
+    bunker.make()
+
+    bunker.render_windows = False
+    bunker.window_height = 10
+    bunker.make()
+
+    bunker.render_windows = True
+    bunker.make()
+
+    expected = Bunker()
+    expected.render_windows = True
+    expected.window_height = 10
+    expected.make()
+
+    assert window_size(bunker) == window_size(expected)
+
+def test_list_edited_in_place_reruns_stage():
+    bunker = Bunker()
+    bunker.incremental_make = True
+    bunker.render_windows = True
+    bunker.make()
+    count = len(bunker.windows.solids().vals())
+
+    bunker.skip_windows.append(1)
+    bunker.make()
+
+    assert len(bunker.windows.solids().vals()) < count
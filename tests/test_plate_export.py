@@ -0,0 +1,24 @@
+from skirmishbunker import Bunker
+
+def test_plate_parts_leave_roof_translate():
+    bunker = Bunker()
+    bunker.render_roof = True
+    bunker.make()
+
+    roof_translate = dict((name, translate) for name, operations, translate in bunker.plate_parts())["roof"]
+    assert (bunker.roof_x_translate, bunker.roof_z_translate) == (None, None)
+
+    # the same place build_plate() puts the roof
+    bunker.set_plate_translate()
+    assert roof_translate == bunker.export_parts()[1][1]
+
+def test_plate_export_leaves_roof_translate(tmp_path):
+    bunker = Bunker()
+    bunker.render_roof = True
+    bunker.make()
+
+    bunker.export_3mf(str(tmp_path / "plate.3mf"), profile="draft", plate=True)
+    assert (bunker.roof_x_translate, bunker.roof_z_translate) == (None, None)
+
+    bunker.export_glb(str(tmp_path / "plate.glb"), profile="draft", plate=True)
+    assert (bunker.roof_x_translate, bunker.roof_z_translate) == (None, None)
@@ -0,0 +1,13 @@
+import os
+import pytest
+from skirmishbunker import StageCache
+
+def test_failed_put_leaves_no_temp_entry(tmp_path):
+    cache = StageCache(str(tmp_path))
+
+    # json.dump fails on the value after the temp entry was created
+    with pytest.raises(TypeError):
+        cache.put("key", {"value": object()})
+
+    assert [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")] == []
+    assert cache.entries() == []
@@ -0,0 +1,17 @@
+from io import BytesIO
+from skirmishbunker import Hatch, stream_stl
+
+def triangles(shape, profile):
+    return stream_stl(shape, BytesIO(), profile=profile)["triangles"]
+
+def test_profile_meshes_do_not_depend_on_history():
+    hatch = Hatch()
+    hatch.make()
+    shape = hatch.build()
+
+    draft = triangles(shape, "draft")
+    fine = triangles(shape, "fine")
+    # a fine mesh left on the shape must not carry over to the next draft export
+    assert triangles(shape, "draft") == draft
+    assert triangles(shape, "fine") == fine
+    assert draft < fine